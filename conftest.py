@@ -0,0 +1,10 @@
+"""
+pytest configuration for the Python backend tests
+
+The OpenAI clients are created when python_backend is imported, and they refuse to
+start without an API key, so tests that never reach the API get a placeholder one.
+"""
+
+import os
+
+os.environ.setdefault('OPENAI_API_KEY', 'test')
@@ -5,6 +5,16 @@ This module contains Python implementations of the data processing,
 domain detection, and analysis capabilities for our Excel data analysis platform.
 """
 
+import os
+
+# Under gunicorn's gevent workers (see gunicorn.conf.py) patch the stdlib before
+# pandas/openai/langchain are imported, so their blocking socket calls yield to
+# other greenlets while a request waits on the LLM APIs. The package is always
+# imported before any of its modules, so this is the one place to do it.
+if os.environ.get('DATALYSIS_GEVENT') == '1':
+    from gevent import monkey
+    monkey.patch_all()
+
 from .domain_detection import detect_data_domain
 from .data_processor import process_data
 from .query_analyzer import analyze_query
@@ -15,4 +25,17 @@ __all__ = [
     'process_data',
     'analyze_query',
     'generate_example_queries'
-]
\ No newline at end of file
+]
+
+def _warmup() -> None:
+    """
+    Run the local data processing pipeline once on a tiny dataset so that lazy
+    imports and JIT-compiled kernels (compiled with cache=True, so later worker
+    restarts load them from disk) are ready before the first real request.
+    """
+    sample = [{'id': i, 'value': float(i), 'category': 'abc'[i % 3]} for i in range(10)]
+    process_data(sample, '')
+
+# Opt-in so that tests and scripts importing the package don't pay for it
+if os.environ.get('DATALYSIS_WARMUP') == '1':
+    _warmup()
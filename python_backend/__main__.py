@@ -0,0 +1,10 @@
+"""
+Run the Python backend's development server: python -m python_backend
+
+The backend is a package (its modules use relative imports), so it is started
+with -m from the repository root rather than as python_backend/app.py.
+"""
+
+from .app import main
+
+main()
@@ -5,32 +5,425 @@ This module implements the Flask API endpoints for domain detection,
 data processing, and query analysis for the Excel data analysis platform.
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
 import os
+import gc
+from flask import Flask, request, abort, stream_with_context
+from functools import wraps
+from contextlib import contextmanager
+from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+import io
 import json
+import hashlib
+import threading
+import orjson
 import pandas as pd
-from typing import List, Dict, Any, Union, Optional
+from cachetools import LRUCache
+from typing import List, Dict, Any, Union, Optional, Callable, Tuple
+
+# Incremental JSON parser for large uploads
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Columnar conversion of row-oriented payloads
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# HTTP response compression (zstd/br/gzip, negotiated via Accept-Encoding)
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+# Fast non-cryptographic hash for response cache keys
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 # Import our backend modules
-from domain_detection import detect_data_domain
-from data_processor import process_data
-from query_analyzer import analyze_query
-from example_generator import generate_example_queries
-from domain_router import (
-    DomainRouter,
-    analyze_domain_query,
-    SUPPORTED_DOMAINS
+from .domain_detection import detect_data_domain, MAX_SAMPLE_ROWS
+from .data_processor import process_data, read_excel_file
+from .query_analyzer import analyze_query
+from .example_generator import generate_example_queries
+from .domain_router import (
+    get_router,
+    SUPPORTED_DOMAINS,
+    SUPPORTED_DOMAIN_SET,
+    DOMAIN_GENERIC
 )
-from visualization_generator import generate_domain_visualizations
+from .visualization_generator import iter_domain_visualizations
+from .job_queue import JobQueue
+from .dataset_store import DatasetStore, DatasetNotFoundError, DatasetStoreFullError
+from .csv_reader import read_csv_bytes, read_csv_text
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Compress JSON responses larger than 1 KB; level 3 keeps zstd/br cheap on CPU
+if COMPRESS_AVAILABLE:
+    app.config['COMPRESS_ALGORITHM'] = ['zstd', 'br', 'gzip']
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_LEVEL'] = 3
+    app.config['COMPRESS_BR_LEVEL'] = 3
+    app.config['COMPRESS_ZSTD_LEVEL'] = 3
+    Compress(app)
+
+# Reject oversized bodies before they are read, so one request can't exhaust a worker's memory
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
+# Endpoints that take a dataset stream its rows (see _stream_json) and may accept more
+DATASET_MAX_CONTENT_LENGTH = int(os.environ.get('DATASET_MAX_CONTENT_LENGTH', 256 * 1024 * 1024))
+
+# Shared router so the LLM client and domain chains are built once per process (the
+# same instance the domain_router helper functions use)
+_router = get_router()
+
+# Background jobs for LLM-bound requests (used by /analyze-query when REDIS_URL is set)
+_jobs = JobQueue()
+
+# Uploaded datasets kept in shared memory, referenced by dataset_id in later requests
+_datasets = DatasetStore()
+
+# Collect the youngest generation far less often: requests allocate large numbers of
+# short-lived dicts/lists while parsing rows, which would otherwise trigger frequent passes
+gc.set_threshold(50_000, 10, 10)
+
+# orjson options for responses: numpy arrays/scalars serialize natively and
+# non-string dict keys (e.g. from value_counts().to_dict()) are stringified
+JSON_RESPONSE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _json_default(obj: Any) -> Any:
+    """Fallback for values orjson can't serialize natively (pandas/numpy scalars, etc.)"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+def _body() -> bytes:
+    """
+    The whole request body. For bodies without a Content-Length get_data stops quietly at
+    the size limit, so read once more: past the limit that raises RequestEntityTooLarge,
+    as the streamed readers do.
+    """
+    body = request.get_data(cache=False)
+    request.stream.read(1)
+    return body
+
+def _json() -> Any:
+    """Parse the request body with orjson instead of Flask's stdlib-based request.json"""
+    body = _body()
+    return orjson.loads(body) if body else {}
+
+# Bodies larger than this are parsed incrementally; below it orjson is faster
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('STREAMING_THRESHOLD_BYTES', 256 * 1024))
+# Number of streamed rows buffered before they are turned into a DataFrame chunk
+STREAMING_CHUNK_ROWS = 10_000
+
+def _build_json_value(event: str, value: Any, events) -> Any:
+    """Assemble one JSON container from an ijson event stream, starting at its opening event"""
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    while depth:
+        _, event, value = next(events)
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+        builder.event(event, value)
+    return builder.value
+
+def _stream_json(rows_key: str = 'data') -> Dict[str, Any]:
+    """
+    Parse the request body incrementally with ijson.
+    
+    Rows under rows_key are turned into DataFrame chunks as they arrive instead of
+    being held as one large list of dicts; other top-level keys are parsed as usual.
+    """
+    # BufferedReader answers ijson's read(0) type probe, which werkzeug's stream
+    # would otherwise treat as a client disconnect
+    events = ijson.parse(io.BufferedReader(request.stream), use_float=True)
+    item_prefix = f'{rows_key}.item'
+    payload = {}
+    chunks = []
+    rows = []
+    has_rows = False
+    
+    for prefix, event, value in events:
+        if prefix == item_prefix:
+            if event in ('start_map', 'start_array'):
+                rows.append(_build_json_value(event, value, events))
+            else:
+                rows.append(value)
+            if len(rows) >= STREAMING_CHUNK_ROWS:
+                chunks.append(pd.DataFrame(rows))
+                rows = []
+        elif prefix == rows_key and event in ('start_array', 'end_array'):
+            has_rows = True
+        elif prefix and '.' not in prefix:
+            if event in ('start_map', 'start_array'):
+                payload[prefix] = _build_json_value(event, value, events)
+            else:
+                payload[prefix] = value
+    
+    if has_rows:
+        if rows:
+            chunks.append(pd.DataFrame(rows))
+        if not chunks:
+            payload[rows_key] = []
+        elif len(chunks) == 1:
+            payload[rows_key] = chunks[0]
+        else:
+            payload[rows_key] = pd.concat(chunks, ignore_index=True)
+    
+    return payload
+
+def _rows_to_frame(rows: Any) -> Any:
+    """
+    Convert a row-oriented dataset (list of dicts) into a columnar DataFrame once per
+    request, so downstream functions don't each rebuild it from the JSON rows.
+    
+    CSV strings, empty lists and already-built DataFrames are returned unchanged.
+    """
+    if not isinstance(rows, list) or not rows:
+        return rows
+    
+    # Arrow takes the columns from the first row only, so rows with other keys are
+    # left to pandas, which keeps the union of all rows' keys
+    if PYARROW_AVAILABLE and isinstance(rows[0], dict):
+        keys = rows[0].keys()
+        if all(isinstance(row, dict) and row.keys() == keys for row in rows):
+            try:
+                return pa.Table.from_pylist(rows).to_pandas(self_destruct=True)
+            except (pa.ArrowException, TypeError):
+                # Columns with mixed value types can't be given an Arrow type
+                pass
+    return pd.DataFrame(rows)
+
+# Binary columnar uploads: the body is an Arrow IPC stream holding the dataset and
+# the other fields (query, domain, preprocessingRules) are passed as query parameters
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+def _arrow_payload(rows_key: str = 'data') -> Dict[str, Any]:
+    """Decode an Arrow IPC stream body into a DataFrame under rows_key"""
+    reader = pa.ipc.open_stream(io.BufferedReader(request.stream))
+    payload: Dict[str, Any] = request.args.to_dict()
+    payload[rows_key] = reader.read_all().to_pandas(self_destruct=True)
+    return payload
+
+# Raw CSV uploads: the body is the CSV file itself, other fields are query parameters
+CSV_MIMETYPE = 'text/csv'
+
+def _csv_payload(rows_key: str = 'data') -> Dict[str, Any]:
+    """Parse a CSV body into a DataFrame under rows_key, without decoding it to a string first"""
+    payload: Dict[str, Any] = request.args.to_dict()
+    payload[rows_key] = read_csv_bytes(_body())
+    return payload
+
+# Excel uploads: the body is the workbook itself, other fields are query parameters
+EXCEL_MIMETYPES = {
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.ms-excel',
+    'application/vnd.ms-excel.sheet.macroEnabled.12',
+    'application/vnd.ms-excel.sheet.binary.macroEnabled.12',
+}
+
+def _excel_payload(rows_key: str = 'data') -> Dict[str, Any]:
+    """Read the first sheet of an Excel workbook body into a DataFrame under rows_key"""
+    payload: Dict[str, Any] = request.args.to_dict()
+    payload[rows_key] = read_excel_file(_body())
+    return payload
+
+def _as_frame(dataset: Any) -> pd.DataFrame:
+    """Turn a CSV string or list of row dicts into a DataFrame (DataFrames pass through)"""
+    if isinstance(dataset, pd.DataFrame):
+        return dataset
+    if isinstance(dataset, str):
+        return read_csv_text(dataset)
+    return pd.DataFrame(dataset)
+
+def _request_dataset(data: Dict[str, Any]) -> Tuple[Any, Any]:
+    """
+    Return (cache key part, dataset) for a request: the stored dataset when the request
+    names a dataset_id (see /datasets), otherwise the rows sent under 'data'
+    """
+    dataset_id = data.get('dataset_id')
+    if dataset_id:
+        return {'dataset_id': dataset_id}, _datasets.get(dataset_id)
+    
+    rows = data.get('data', [])
+    return rows, rows
+
+def _json_with_rows(rows_key: str = 'data') -> Dict[str, Any]:
+    """
+    Parse a request whose rows_key holds the dataset: Arrow IPC bodies are decoded
+    directly, large JSON bodies are streamed and small ones parsed with orjson.
+    Parsing creates a dict per row, so it runs with the garbage collector paused.
+    """
+    with _no_gc():
+        return _parse_json_with_rows(rows_key)
+
+def _parse_json_with_rows(rows_key: str) -> Dict[str, Any]:
+    if PYARROW_AVAILABLE and request.mimetype == ARROW_STREAM_MIMETYPE:
+        return _arrow_payload(rows_key)
+    if request.mimetype == CSV_MIMETYPE:
+        return _csv_payload(rows_key)
+    if request.mimetype in EXCEL_MIMETYPES:
+        return _excel_payload(rows_key)
+    if IJSON_AVAILABLE and (request.content_length or 0) > STREAMING_THRESHOLD_BYTES:
+        return _stream_json(rows_key)
+    return _json()
+
+# Content-addressed cache for endpoints whose results depend only on their inputs
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+_response_cache = LRUCache(maxsize=max(RESPONSE_CACHE_SIZE, 1))
+_response_cache_lock = threading.Lock()
+
+def _frame_fingerprint(df: pd.DataFrame) -> List[Any]:
+    """Stand-in for a DataFrame in cache keys: its columns, dtypes and a hash of its values"""
+    try:
+        values = pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+    except TypeError:
+        # Unhashable cell values (nested lists/dicts)
+        values = df.to_json(orient='values').encode()
+    return [list(map(str, df.columns)), list(map(str, df.dtypes)), hashlib.blake2b(values, digest_size=16).hexdigest()]
+
+def _cache_key(endpoint: str, *parts: Any) -> str:
+    """Hash an endpoint name and its inputs into a response cache key"""
+    parts = tuple(_frame_fingerprint(part) if isinstance(part, pd.DataFrame) else part for part in parts)
+    payload = orjson.dumps([endpoint, *parts], default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_hexdigest(payload)
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+def _cached(key: str, compute: Callable[[], Any], should_cache: Callable[[Any], bool]) -> Tuple[Any, bool]:
+    """
+    Return (result, hit) for a cache key, computing and storing the result on a miss.
+    
+    Results rejected by should_cache (e.g. API errors) are returned but not stored.
+    """
+    hit, result = _cache_get(key)
+    if hit:
+        return result, True
+    
+    result = compute()
+    
+    if should_cache(result):
+        _cache_put(key, result)
+    return result, False
+
+def _cache_get(key: str) -> Tuple[bool, Any]:
+    """Return (hit, result) for a cache key without computing anything"""
+    if RESPONSE_CACHE_SIZE > 0:
+        with _response_cache_lock:
+            if key in _response_cache:
+                return True, _response_cache[key]
+    return False, None
+
+def _cache_put(key: str, result: Any) -> None:
+    """Store a result under a cache key"""
+    if RESPONSE_CACHE_SIZE > 0:
+        with _response_cache_lock:
+            _response_cache[key] = result
+
+# Request bodies currently being parsed with the garbage collector paused (see _no_gc)
+_no_gc_depth = 0
+_no_gc_lock = threading.Lock()
+
+@contextmanager
+def _no_gc():
+    """
+    Pause the cyclic garbage collector while a request body is parsed into rows.
+    
+    Only the parsing is covered, never the LLM calls that follow: gc.disable() is
+    process-wide and requests overlap, so the collector is re-enabled only when the last
+    paused section finishes, and sections that waited on the network could keep it off
+    for good. Each section runs a young-generation collection on exit.
+    """
+    global _no_gc_depth
+    with _no_gc_lock:
+        if _no_gc_depth == 0 and not gc.isenabled():
+            # Disabled by someone else - leave it alone
+            paused = False
+        else:
+            paused = True
+            _no_gc_depth += 1
+            gc.disable()
+    try:
+        yield
+    finally:
+        if paused:
+            with _no_gc_lock:
+                _no_gc_depth -= 1
+                if _no_gc_depth == 0:
+                    gc.enable()
+            gc.collect(0)
+
+def limit_content_length(max_bytes: Optional[int] = None):
+    """
+    Reject requests whose declared body size exceeds max_bytes (default MAX_CONTENT_LENGTH)
+    with a 413 before the endpoint runs, and apply the same limit to the body stream.
+    Bodies without a Content-Length (chunked uploads) raise RequestEntityTooLarge once
+    they pass the limit while being read, so endpoints re-raise HTTPExceptions rather
+    than reporting them as a 500.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limit = max_bytes or app.config['MAX_CONTENT_LENGTH']
+            request.max_content_length = limit
+            if (request.content_length or 0) > limit:
+                abort(413)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def make_json_response(obj: Any, status: int = 200):
+    """Serialize a response payload with orjson"""
+    return app.response_class(
+        orjson.dumps(obj, default=_json_default, option=JSON_RESPONSE_OPTIONS),
+        status=status,
+        mimetype='application/json'
+    )
+
+# Error bodies are filled in at the bytes level rather than serializing a new dict
+_ERROR_TEMPLATE = b'{"error":%s,"message":%s}'
+
+def _err(message: str, detail: str, status: int = 500):
+    """Error response in the endpoints' {'error', 'message'} shape"""
+    return app.response_class(
+        _ERROR_TEMPLATE % (orjson.dumps(detail), orjson.dumps(message)),
+        status=status,
+        mimetype='application/json'
+    )
+
+def _dataset_not_found(e: DatasetNotFoundError):
+    """404 for requests naming an unknown or expired dataset_id"""
+    return _err('Dataset not found', f"Unknown or expired dataset id: {e.args[0]}", 404)
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Structured JSON error for bodies over the content-length limit"""
+    return _err(
+        f"Request body exceeds the limit of {request.max_content_length} bytes",
+        'Request body too large',
+        413
+    )
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return make_json_response({
         'status': 'healthy',
         'message': 'Python backend is running',
         'supported_domains': SUPPORTED_DOMAINS,
@@ -41,114 +434,277 @@ def health_check():
     })
 
 @app.route('/detect-domain', methods=['POST'])
+@limit_content_length()
 def domain_detection_endpoint():
     """Detect domain from column names and sample data"""
     try:
         # Get request data
-        data = request.json
+        data = _json()
         columns = data.get('columns', [])
-        sample_data = data.get('sampleData', [])
+        # Only the leading rows are used, so cap before hashing the payload
+        sample_data = (data.get('sampleData') or [])[:MAX_SAMPLE_ROWS]
         
-        # Call domain detection
-        result = detect_data_domain(columns, sample_data)
+        # Call domain detection (cached by payload)
+        result, hit = _cached(
+            _cache_key('detect-domain', columns, sample_data),
+            lambda: detect_data_domain(columns, sample_data),
+            lambda r: r.get('domain') != 'Error'
+        )
         
-        return jsonify(result)
+        response = make_json_response(result)
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'message': 'Failed to detect domain'
-        }), 500
+        return _err('Failed to detect domain', str(e))
 
 @app.route('/process-data', methods=['POST'])
+@limit_content_length(DATASET_MAX_CONTENT_LENGTH)
 def process_data_endpoint():
     """Process data with AI-enhanced analysis"""
     try:
-        # Get request data
-        data = request.json
-        file_content = data.get('data', [])
+        # Get request data (large row arrays are streamed into a DataFrame)
+        data = _json_with_rows('data')
+        _, file_content = _request_dataset(data)
+        file_content = _rows_to_frame(file_content)
         preprocessing_rules = data.get('preprocessingRules', '')
         
         # Call data processor
         result = process_data(file_content, preprocessing_rules)
         
-        return jsonify(result)
+        return make_json_response(result)
+    except DatasetNotFoundError as e:
+        return _dataset_not_found(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'message': 'Failed to process data'
-        }), 500
+        return _err('Failed to process data', str(e))
 
 @app.route('/analyze-query', methods=['POST'])
+@limit_content_length(DATASET_MAX_CONTENT_LENGTH)
 def analyze_query_endpoint():
     """Analyze a natural language query against the dataset"""
     try:
-        # Get request data
-        data = request.json
+        # Get request data (large row arrays are streamed into a DataFrame)
+        data = _json_with_rows('data')
         query = data.get('query', '')
-        dataset = data.get('data', [])
+        _, dataset = _request_dataset(data)
+        dataset = _rows_to_frame(dataset)
         domain = data.get('domain', 'Generic')
         
-        # Use domain router if domain is provided
-        if domain and domain != 'Generic':
-            result = analyze_domain_query(domain, dataset, query)
-        else:
-            # Fall back to general query analyzer
-            result = analyze_query(query, dataset)
+        # ?stream=1 sends the analysis text as server-sent events while the model writes it
+        if request.args.get('stream') == '1' and domain in SUPPORTED_DOMAIN_SET and domain != DOMAIN_GENERIC:
+            return _stream_query_analysis(domain, dataset, query)
+        
+        # With rq the LLM call runs as a background job that any worker can report on
+        # (?sync=1 answers in the same request instead). In-process job results live only
+        # in the worker that ran them, where polls from other workers can't find them,
+        # so without rq the query is answered in the same request.
+        if not _jobs.uses_rq or request.args.get('sync') == '1':
+            return make_json_response(run_query_analysis(domain, dataset, query))
         
-        return jsonify(result)
+        job_id = _jobs.submit(run_query_analysis, domain, dataset, query)
+        response = make_json_response({'job_id': job_id, 'status': 'queued'}, 202)
+        response.headers['Location'] = f'/jobs/{job_id}'
+        return response
+    except DatasetNotFoundError as e:
+        return _dataset_not_found(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return _err('Failed to analyze query', str(e))
+
+def run_query_analysis(domain: str, dataset: Any, query: str) -> Dict[str, Any]:
+    """Analyze a query with the domain router for supported domains, or the general analyzer"""
+    if domain in SUPPORTED_DOMAIN_SET and domain != DOMAIN_GENERIC:
+        return _router.route_and_analyze(domain, dataset, query)
+    
+    # Fall back to general query analyzer
+    return analyze_query(query, dataset)
+
+def _stream_query_analysis(domain: str, dataset: Any, query: str):
+    """
+    Server-sent events response for a domain analysis: a "token" event (a JSON string) per
+    piece of text, then "done" with the domain that answered, or "error" if the analysis
+    fails part way through. Invalid data raises here, before the response starts.
+    """
+    analysis = _router.stream_route_and_analyze(domain, dataset, query)
+    
+    def stream():
+        try:
+            for text in analysis:
+                yield b'event: token\ndata: ' + orjson.dumps(text) + b'\n\n'
+        except Exception as e:
+            yield b'event: error\ndata: ' + orjson.dumps({'error': 'Analysis failed', 'details': str(e)}) + b'\n\n'
+        else:
+            yield b'event: done\ndata: ' + orjson.dumps({'domain': analysis.domain}) + b'\n\n'
+    
+    response = app.response_class(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status_endpoint(job_id: str):
+    """Status of a background job, with its result once finished"""
+    try:
+        status = _jobs.status(job_id)
+        if status is None:
+            return _err('Job not found', f'No job with id {job_id}', 404)
+        return make_json_response(status)
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'message': 'Failed to analyze query'
-        }), 500
+        return _err('Failed to get job status', str(e))
 
 @app.route('/example-queries', methods=['POST'])
+@limit_content_length(DATASET_MAX_CONTENT_LENGTH)
 def example_queries_endpoint():
     """Generate example queries for the dataset"""
     try:
-        # Get request data
-        data = request.json
-        dataset = data.get('data', [])
+        # Get request data (Arrow or large JSON bodies arrive as a DataFrame)
+        data = _json_with_rows('data')
+        key_part, dataset = _request_dataset(data)
         domain = data.get('domain', None)
         
-        # Generate example queries
-        queries = generate_example_queries(dataset)
+        # Generate example queries (cached by dataset)
+        queries, hit = _cached(
+            _cache_key('example-queries', key_part),
+            lambda: generate_example_queries(_rows_to_frame(dataset)),
+            lambda qs: not any(q.startswith('Error:') for q in qs)
+        )
         
-        return jsonify({
+        response = make_json_response({
             'queries': queries,
             'domain': domain
         })
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+    except DatasetNotFoundError as e:
+        return _dataset_not_found(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'message': 'Failed to generate example queries'
-        }), 500
+        return _err('Failed to generate example queries', str(e))
 
 @app.route('/domain-visualizations', methods=['POST'])
+@limit_content_length(DATASET_MAX_CONTENT_LENGTH)
 def domain_visualizations_endpoint():
     """Generate domain-specific visualization suggestions"""
     try:
-        # Get request data
-        data = request.json
+        # Get request data (Arrow or large JSON bodies arrive as a DataFrame)
+        data = _json_with_rows('data')
         domain = data.get('domain', 'Generic')
-        dataset = data.get('data', [])
+        key_part, dataset = _request_dataset(data)
         
-        # Generate domain-specific visualizations
-        visualizations = generate_domain_visualizations(domain, dataset)
+        # Cached visualizations (by dataset and domain) are returned in one piece
+        key = _cache_key('domain-visualizations', domain, key_part)
+        hit, visualizations = _cache_get(key)
+        if hit:
+            response = make_json_response({
+                'visualizations': visualizations,
+                'domain': domain
+            })
+            response.headers['X-Cache'] = 'HIT'
+            return response
         
-        return jsonify({
-            'visualizations': visualizations,
-            'domain': domain
+        # Otherwise stream each visualization as soon as it is ready
+        frame = _rows_to_frame(dataset)
+        
+        def stream():
+            generated = []
+            yield b'{"visualizations":['
+            for viz in iter_domain_visualizations(domain, frame):
+                separator = b',' if generated else b''
+                yield separator + orjson.dumps(viz, default=_json_default, option=JSON_RESPONSE_OPTIONS)
+                generated.append(viz)
+            yield b'],"domain":' + orjson.dumps(domain) + b'}'
+            
+            if all(isinstance(v, dict) and v.get('chart_type') != 'error' and not v.get('error') for v in generated):
+                _cache_put(key, generated)
+        
+        response = app.response_class(stream_with_context(stream()), mimetype='application/json')
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    except DatasetNotFoundError as e:
+        return _dataset_not_found(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return _err('Failed to generate domain visualizations', str(e))
+
+@app.route('/analyze-all', methods=['POST'])
+@limit_content_length(DATASET_MAX_CONTENT_LENGTH)
+def analyze_all_endpoint():
+    """Detect the domain, process the data and generate example queries in one call"""
+    try:
+        # Get request data (large row arrays are streamed into a DataFrame)
+        data = _json_with_rows('data')
+        _, dataset = _request_dataset(data)
+        preprocessing_rules = data.get('preprocessingRules', '')
+        
+        # Build the DataFrame once and share it between the three steps
+        dataset = _as_frame(_rows_to_frame(dataset))
+        
+        columns = data.get('columns') or [str(col) for col in dataset.columns]
+        sample_data = dataset.head(MAX_SAMPLE_ROWS).to_dict('records')
+        
+        # Domain detection shares the /detect-domain cache
+        domain, _ = _cached(
+            _cache_key('detect-domain', columns, sample_data),
+            lambda: detect_data_domain(columns, sample_data),
+            lambda r: r.get('domain') != 'Error'
+        )
+        processed = process_data(dataset, preprocessing_rules)
+        queries = generate_example_queries(dataset)
+        
+        return make_json_response({
+            'domain': domain,
+            'processed': processed,
+            'queries': queries
         })
+    except DatasetNotFoundError as e:
+        return _dataset_not_found(e)
+    except HTTPException:
+        raise
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'message': 'Failed to generate domain visualizations'
-        }), 500
+        return _err('Failed to analyze data', str(e))
 
-if __name__ == '__main__':
+@app.route('/datasets', methods=['POST'])
+@limit_content_length(DATASET_MAX_CONTENT_LENGTH)
+def store_dataset_endpoint():
+    """Store a dataset in shared memory so later requests can pass its dataset_id instead of the rows"""
+    try:
+        # Get request data (large row arrays are streamed into a DataFrame)
+        data = _json_with_rows('data')
+        dataset = _as_frame(_rows_to_frame(data.get('data', [])))
+        
+        try:
+            dataset_id = _datasets.put(dataset)
+        except DatasetStoreFullError as e:
+            return _err('Insufficient storage for dataset', str(e), 507)
+        
+        return make_json_response({
+            'dataset_id': dataset_id,
+            'rows': len(dataset),
+            'columns': [str(col) for col in dataset.columns],
+            'expires_in': _datasets.ttl_seconds
+        }, 201)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return _err('Failed to store dataset', str(e))
+
+def main() -> None:
+    """Run the development server (python -m python_backend)"""
     # Set the port - use environment variable or default to 5001
     port = int(os.environ.get('PYTHON_PORT', 5001))
     
+    # Development server only - production must run under gunicorn (gunicorn.conf.py).
+    # The reloader would fork a second copy of the process (models, caches), so it stays
+    # off even in debug mode; threaded lets slow LLM calls overlap.
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    
     print(f"Starting Python backend on port {port}...")
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=debug, use_reloader=False, threaded=True)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
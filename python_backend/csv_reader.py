@@ -0,0 +1,84 @@
+"""
+CSV parsing for the Python backend
+
+CSV text sent by the frontend is parsed with Arrow's multithreaded C++ reader, which
+builds typed columns directly instead of creating a Python object per cell, and the
+resulting table is handed to pandas column by column. pandas' own C parser is used
+when pyarrow isn't installed or the file needs pandas' handling (duplicate headers,
+integers too wide for int64).
+"""
+
+import io
+import logging
+from typing import Dict, Optional
+
+import pandas as pd
+
+# Arrow's CSV reader parses on all cores and releases the GIL
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+def _arrow_read_csv(buffer: 'pa.Buffer', column_types: Optional[Dict[str, 'pa.DataType']] = None) -> 'pa.Table':
+    """Parse CSV bytes with Arrow, using pandas' rules for what counts as missing"""
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        timestamp_parsers=[],
+        strings_can_be_null=True,
+    )
+    return pa_csv.read_csv(pa.BufferReader(buffer), convert_options=convert_options)
+
+def _has_wide_integers(table: 'pa.Table') -> bool:
+    """
+    Whether a column Arrow typed as double may hold integers beyond int64, which pandas
+    keeps exact (uint64 or Python ints) but Arrow rounds to floats
+    """
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_floating(field.type):
+            low, high = pc.min_max(column).values()
+            if low.is_valid and max(-low.as_py(), high.as_py()) >= 2 ** 63:
+                return True
+    return False
+
+def read_csv_text(text: str) -> pd.DataFrame:
+    """Parse a CSV string into a DataFrame"""
+    try:
+        data = text.encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates can't be encoded; pandas parses the string itself
+        return pd.read_csv(io.StringIO(text))
+    return read_csv_bytes(data)
+
+def read_csv_bytes(data: bytes) -> pd.DataFrame:
+    """
+    Parse UTF-8 CSV bytes (e.g. a raw request body) into a DataFrame. Arrow reads
+    the bytes in place, so no decoded Python string copy of the upload is made.
+    """
+    if PYARROW_AVAILABLE:
+        try:
+            buffer = pa.py_buffer(data)
+            table = _arrow_read_csv(buffer)
+            # Leave date, time and timestamp values as text, as pandas.read_csv does
+            temporal = {field.name: pa.string() for field in table.schema
+                        if pa.types.is_date(field.type) or pa.types.is_time(field.type)
+                        or pa.types.is_timestamp(field.type)}
+            if temporal:
+                table = _arrow_read_csv(buffer, temporal)
+        except pa.ArrowInvalid as e:
+            logger.debug(f"Arrow CSV reader failed, falling back to pandas: {str(e)}")
+        else:
+            # Empty headers get pandas' "Unnamed: <position>" names
+            names = [name or f'Unnamed: {i}' for i, name in enumerate(table.column_names)]
+            # pandas renames duplicate headers ("a", "a.1"); Arrow keeps them as-is
+            if len(set(names)) == len(names) and not _has_wide_integers(table):
+                if names != table.column_names:
+                    table = table.rename_columns(names)
+                return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    return pd.read_csv(io.BytesIO(data))
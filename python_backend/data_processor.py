@@ -1,23 +1,33 @@
 import json
 import logging
 import os
+import sys
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Union, Optional
+from typing import List, Dict, Any, Union, Optional, Tuple, Callable, Iterable
 import time
 import io
 from datetime import datetime
 import re
+import warnings
+import copy
+import hashlib
+import functools
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
 
-# Import OpenAI for AI-enhanced analysis
-from openai import OpenAI
+# Import OpenAI for AI-enhanced analysis (shared client with pooled connections)
+from .openai_client import client
 
 # Import our domain detector
-from domain_detection import detect_data_domain
+from .domain_detection import detect_data_domain
+from .csv_reader import read_csv_text
 
 # Import the enhanced cleaner
 try:
-    from enhanced_data_cleaner import enhanced_clean_data, EnhancedDataCleaner
+    from .enhanced_data_cleaner import enhanced_clean_data, EnhancedDataCleaner
     ENHANCED_CLEANING_AVAILABLE = True
 except ImportError:
     ENHANCED_CLEANING_AVAILABLE = False
@@ -25,26 +35,204 @@ except ImportError:
 
 # Import the intelligent EDA system
 try:
-    from eda_engine import intelligent_eda_analysis
+    from .eda_engine import intelligent_eda_analysis
     INTELLIGENT_EDA_AVAILABLE = True
 except ImportError:
     INTELLIGENT_EDA_AVAILABLE = False
     logger.warning("Intelligent EDA system not available")
 
+# numexpr backs DataFrame.eval/query with vectorized, cache-blocked kernels
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
+# Arrow's hash aggregation runs chart groupbys on large frames across all cores
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# fast-histogram bins uniform-width histograms in a single C loop
+try:
+    from fast_histogram import histogram1d
+    FAST_HISTOGRAM_AVAILABLE = True
+except ImportError:
+    FAST_HISTOGRAM_AVAILABLE = False
+
+# Numba compiles the single-pass column statistics kernels; without it the same code runs as plain Python
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Excel engine: calamine (Rust) is ~2x faster than openpyxl and reads .xlsb natively.
+# PREFERRED_EXCEL_ENGINE overrides it (e.g. "openpyxl") for A/B comparisons.
+PREFERRED_EXCEL_ENGINE = os.environ.get('PREFERRED_EXCEL_ENGINE', 'calamine')
+
+# pandas 3 always uses Copy-on-Write; earlier versions only when the application enables it
+PANDAS_COPY_ON_WRITE_DEFAULT = int(pd.__version__.split('.')[0]) >= 3
+
+# "filter: expression" (group 1) and "compute: target = expression" (groups 2 and 3) rule lines
+EXPRESSION_RULE_PATTERN = re.compile(
+    r'^[ \t]*(?:(?i:filter)[ \t]*:[ \t]*(\S.*?)'
+    r'|(?i:compute)[ \t]*:[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=(?!=)[ \t]*(\S.*?))\s*?$',
+    re.MULTILINE)
+# Expression rules come from the request, so anything beyond column arithmetic is refused:
+# local variable references (@), attribute and method access, and dunder names
+UNSAFE_EXPRESSION_PATTERN = re.compile(r'@|__|\.[ \t]*[A-Za-z_]')
+TARGET_COLUMN_PATTERN = re.compile(r'target[_\s]*column[_\s]*[:\=]\s*([a-zA-Z_][a-zA-Z0-9_]*)')
+
+# apply_preprocessing flag words (matched anywhere in the lower-cased rules) and
+# "normalize_case: column" / "replace: column: old | new" rule lines
+BASIC_RULE_PATTERN = re.compile('remove_empty_rows|remove_empty_columns|trim_strings|convert_types')
+COLUMN_RULE_PATTERN = re.compile(r'^[ \t]*(normalize_case|replace):(.*)$', re.MULTILINE)
+
+# Enhanced cleaning option words (all found in one scan of the lower-cased rules) and
+# the "missing_threshold: N%" rule
+CLEANING_OPTION_PATTERN = re.compile(
+    'standardize_data|normalize_data|minmax|log_transform|boxcox|encode_categorical|'
+    'label_encoding|target_encoding|frequency_encoding|create_bins|binning|'
+    'feature_engineering|missing_indicators|knn_imputation|zscore_outliers|remove_outliers|'
+    'geospatial|remove_html|remove_emojis|advanced_text_cleaning|unit_conversion|convert_units')
+MISSING_THRESHOLD_PATTERN = re.compile(r'missing_threshold[:\s]+(\d+\.?\d*)%?')
+
+# Recent AI insights keyed by a hash of their prompt (dataset sample + domain), so
+# re-uploading the same file doesn't repeat the OpenAI call
+AI_INSIGHTS_CACHE_SIZE = int(os.environ.get('AI_INSIGHTS_CACHE_SIZE', 128))
+_insights_cache = LRUCache(maxsize=max(AI_INSIGHTS_CACHE_SIZE, 1))
+_insights_cache_lock = threading.Lock()
+
+# AI insight prompts describe the dataset with its schema, summary statistics and a few
+# example rows (at most AI_INSIGHTS_MAX_COLUMNS columns) rather than a raw CSV dump
+AI_INSIGHTS_MAX_COLUMNS = 20
+AI_INSIGHTS_SAMPLE_ROWS = 5
+AI_INSIGHTS_MAX_TOKENS = 800
+
+@njit(parallel=True, cache=True)
+def numeric_column_moments(values: np.ndarray) -> np.ndarray:
+    """
+    Count, mean, sample std, min and max of each column of a 2-D float64 array,
+    skipping NaNs, in one pass per column (Welford's update for mean and variance).
+    
+    Returns a (5, n_cols) array; statistics of columns with too few values are NaN.
+    fastmath is deliberately off: it would let the compiler assume there are no NaNs.
+    """
+    n_rows, n_cols = values.shape
+    moments = np.full((5, n_cols), np.nan)
+    
+    for j in prange(n_cols):
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        low = np.inf
+        high = -np.inf
+        
+        for i in range(n_rows):
+            value = values[i, j]
+            if np.isnan(value):
+                continue
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+            low = min(low, value)
+            high = max(high, value)
+        
+        moments[0, j] = count
+        if count > 0:
+            moments[1, j] = mean
+            moments[3, j] = low
+            moments[4, j] = high
+        if count > 1:
+            moments[2, j] = np.sqrt(m2 / (count - 1))
+    
+    return moments
+
+@njit(parallel=True, cache=True)
+def count_outliers(values: np.ndarray, lower_bounds: np.ndarray, upper_bounds: np.ndarray) -> np.ndarray:
+    """
+    Number of values in each column of a 2-D float64 array that fall outside that
+    column's bounds (NaNs never do), counted in one pass without building masks
+    """
+    n_rows, n_cols = values.shape
+    counts = np.zeros(n_cols, dtype=np.int64)
+    
+    for j in prange(n_cols):
+        low = lower_bounds[j]
+        high = upper_bounds[j]
+        count = 0
+        for i in range(n_rows):
+            value = values[i, j]
+            if value < low or value > high:
+                count += 1
+        counts[j] = count
+    
+    return counts
+
+# Datasets with fewer rows (after preprocessing) get a minimal result without analysis
+MIN_ANALYSIS_ROWS = 5
+
+# Tables at least this wide have their columns profiled (and preprocessed) on a thread pool
+PROFILE_PARALLEL_MIN_COLUMNS = 32
+PROFILE_WORKERS = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+
+def _gevent_patched() -> bool:
+    """Whether gevent has monkey-patched threading (gunicorn's gevent workers, see __init__)"""
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+def _map_on_threads(func: Callable[[Any], Any], items: Iterable[Any], thread_name_prefix: str) -> List[Any]:
+    """
+    [func(item) for item in items] on PROFILE_WORKERS OS threads. Under gevent a
+    ThreadPoolExecutor's threads are greenlets sharing one OS thread, so the work is
+    sent to gevent's pool of native threads instead.
+    """
+    if _gevent_patched():
+        from gevent import get_hub
+        return list(get_hub().threadpool.imap(func, items))
+    
+    with ThreadPoolExecutor(max_workers=PROFILE_WORKERS, thread_name_prefix=thread_name_prefix) as executor:
+        return list(executor.map(func, items))
+
+# Chart groupbys on frames with at least this many rows use Arrow's multithreaded
+# hash aggregation instead of pandas' single-threaded groupby (on one core pandas
+# is faster, so it is only used when more are available)
+ARROW_GROUPBY_MIN_ROWS = 100_000
+# Finite values above which histograms are binned by fast-histogram instead of numpy
+FAST_HISTOGRAM_MIN_ROWS = 100_000
 
-def process_data(file_content: Union[str, List[Dict[str, Any]]], preprocessing_rules: Optional[str] = None) -> Dict[str, Any]:
+# Column-name keywords used to pick chart columns in generate_visualizations
+TIME_COLUMN_PATTERN = re.compile('date|time|year|month|day', re.IGNORECASE)
+NUTRITION_COLUMN_PATTERN = re.compile('calorie|protein|fat|carb|sugar', re.IGNORECASE)
+FINANCIAL_COLUMN_PATTERN = re.compile('price|revenue|cost|amount|sale', re.IGNORECASE)
+HEALTH_COLUMN_PATTERN = re.compile('age|weight|height|bmi|pressure|rate', re.IGNORECASE)
+
+# Column dtypes holding text (object columns, plus the string dtype pandas 3 uses by default)
+TEXT_DTYPES = ['object', 'string']
+
+def process_data(file_content: Union[str, bytes, List[Dict[str, Any]], pd.DataFrame], preprocessing_rules: Optional[str] = None) -> Dict[str, Any]:
     """
     Process data with comprehensive AI-enhanced analysis
     
     Args:
-        file_content: Either a CSV string or list of dictionaries representing the data
+        file_content: A CSV string, the bytes of an uploaded Excel workbook, list of
+            dictionaries, or DataFrame representing the data
         preprocessing_rules: Optional string containing preprocessing instructions
         
     Returns:
@@ -52,10 +240,14 @@ def process_data(file_content: Union[str, List[Dict[str, Any]]], preprocessing_r
     """
     try:
         # Convert data to DataFrame
-        if isinstance(file_content, str):
-            df = pd.read_csv(io.StringIO(file_content))
+        if isinstance(file_content, bytes):
+            df = read_excel_file(file_content)
+        elif isinstance(file_content, str):
+            df = read_csv_text(file_content)
         elif isinstance(file_content, list):
             df = pd.DataFrame(file_content)
+        elif isinstance(file_content, pd.DataFrame):
+            df = file_content
         else:
             raise ValueError(f"Unsupported data type: {type(file_content)}")
         
@@ -69,8 +261,10 @@ def process_data(file_content: Union[str, List[Dict[str, Any]]], preprocessing_r
             'original_shape': {'rows': len(df), 'columns': len(df.columns)}
         }
         
-        # Data cleaning (if requested)
-        if rules_config.get('enhanced_cleaning', False) and ENHANCED_CLEANING_AVAILABLE:
+        # Data cleaning (if requested); an empty upload has nothing to clean
+        if df.empty:
+            results['cleaning_applied'] = False
+        elif rules_config.get('enhanced_cleaning', False) and ENHANCED_CLEANING_AVAILABLE:
             logger.info("Applying enhanced data cleaning...")
             cleaning_config = parse_enhanced_cleaning_config(preprocessing_rules)
             df, cleaning_log = enhanced_clean_data(df, cleaning_config)
@@ -81,6 +275,13 @@ def process_data(file_content: Union[str, List[Dict[str, Any]]], preprocessing_r
             df = preprocess_dataframe(df, rules_config)
             results['cleaning_applied'] = False
         
+        # Missing values per column, counted once for every summary below
+        missing_counts = df.isna().sum()
+        
+        # Too little data to analyze: skip the EDA and insight passes entirely
+        if len(df) < MIN_ANALYSIS_ROWS or len(df.columns) == 0:
+            return insufficient_data_result(df, results, missing_counts)
+        
         # Intelligent EDA Analysis
         target_column = rules_config.get('target_column', None)
         
@@ -90,10 +291,10 @@ def process_data(file_content: Union[str, List[Dict[str, Any]]], preprocessing_r
             results['eda_analysis'] = eda_results
         else:
             # Fallback to basic analysis
-            results['eda_analysis'] = basic_analysis_fallback(df)
+            results['eda_analysis'] = basic_analysis_fallback(df, missing_counts)
         
         # Generate comprehensive insights
-        results['insights'] = generate_comprehensive_insights(df, results.get('eda_analysis', {}))
+        results['insights'] = generate_comprehensive_insights(df, results.get('eda_analysis', {}), missing_counts)
         
         # Final data summary
         results['final_shape'] = {'rows': len(df), 'columns': len(df.columns)}
@@ -109,15 +310,43 @@ def process_data(file_content: Union[str, List[Dict[str, Any]]], preprocessing_r
             'timestamp': datetime.now().isoformat()
         }
 
+def read_excel_file(content: bytes, sheet_name: Union[str, int] = 0) -> pd.DataFrame:
+    """
+    Read an uploaded Excel workbook (its bytes, never a path on the server) with the
+    preferred engine, falling back to pandas' default engine (openpyxl/xlrd/pyxlsb)
+    when it isn't installed
+    """
+    try:
+        return pd.read_excel(io.BytesIO(content), sheet_name=sheet_name, engine=PREFERRED_EXCEL_ENGINE)
+    except ImportError:
+        logger.warning(f"Excel engine '{PREFERRED_EXCEL_ENGINE}' not available, using pandas default")
+        return pd.read_excel(io.BytesIO(content), sheet_name=sheet_name)
+
 def parse_preprocessing_rules(preprocessing_rules: str) -> Dict[str, Any]:
     """Parse preprocessing rules string into configuration dictionary"""
-    
+    # Repeated uploads usually come with the same rules; the memoized result is shared,
+    # so hand out a copy the caller can modify
+    config = _parse_preprocessing_rules(preprocessing_rules)
+    return {**config, 'expressions': list(config['expressions'])}
+
+@functools.lru_cache(maxsize=256)
+def _parse_preprocessing_rules(preprocessing_rules: str) -> Dict[str, Any]:
     config = {
         'enhanced_cleaning': False,
         'target_column': None,
-        'eda_type': 'auto'  # auto, basic, complex, timeseries, geospatial, textual
+        'eda_type': 'auto',  # auto, basic, complex, timeseries, geospatial, textual
+        'rules': preprocessing_rules,
+        'expressions': [],  # (target column or None for filters, expression)
     }
     
+    # Expression rules, kept in order so later lines can use earlier columns
+    for match in EXPRESSION_RULE_PATTERN.finditer(preprocessing_rules):
+        filter_expression, target, expression = match.groups()
+        if filter_expression is not None:
+            config['expressions'].append((None, filter_expression))
+        else:
+            config['expressions'].append((target, expression))
+    
     rules_lower = preprocessing_rules.lower()
     
     # Enhanced cleaning detection
@@ -125,7 +354,7 @@ def parse_preprocessing_rules(preprocessing_rules: str) -> Dict[str, Any]:
         config['enhanced_cleaning'] = True
     
     # Target column detection
-    target_match = re.search(r'target[_\s]*column[_\s]*[:\=]\s*([a-zA-Z_][a-zA-Z0-9_]*)', rules_lower)
+    target_match = TARGET_COLUMN_PATTERN.search(rules_lower)
     if target_match:
         config['target_column'] = target_match.group(1)
     
@@ -143,20 +372,68 @@ def parse_preprocessing_rules(preprocessing_rules: str) -> Dict[str, Any]:
     
     return config
 
-def basic_analysis_fallback(df: pd.DataFrame) -> Dict[str, Any]:
+def insufficient_data_result(df: pd.DataFrame, results: Dict[str, Any],
+                             missing_counts: Optional[pd.Series] = None) -> Dict[str, Any]:
+    """Finish process_data results for a dataset too small to analyze"""
+    logger.info(f"Skipping analysis of a {len(df)}x{len(df.columns)} dataset")
+    if missing_counts is None:
+        missing_counts = df.isna().sum()
+    
+    results['eda_analysis'] = {
+        'eda_type': 'insufficient_data',
+        'data_types': _dtype_names(df),
+        'missing_values': _series_dict(missing_counts),
+        'shape': {'rows': len(df), 'columns': len(df.columns)},
+        'message': f'At least {MIN_ANALYSIS_ROWS} rows with one or more columns are needed for analysis'
+    }
+    results['insights'] = [{
+        'type': 'data_quality',
+        'title': 'Insufficient Data',
+        'description': f'The dataset has {len(df)} rows and {len(df.columns)} columns after preprocessing',
+        'recommendation': f'Upload at least {MIN_ANALYSIS_ROWS} rows of data to get an analysis'
+    }]
+    results['final_shape'] = {'rows': len(df), 'columns': len(df.columns)}
+    results['processing_summary'] = generate_processing_summary(results)
+    
+    return results
+
+def basic_analysis_fallback(df: pd.DataFrame, missing_counts: Optional[pd.Series] = None) -> Dict[str, Any]:
     """Fallback basic analysis when intelligent EDA is not available"""
+    if missing_counts is None:
+        missing_counts = df.isna().sum()
     
     return {
         'eda_type': 'basic_fallback',
-        'summary_statistics': df.describe().to_dict(),
-        'data_types': df.dtypes.astype(str).to_dict(),
-        'missing_values': df.isnull().sum().to_dict(),
+        'summary_statistics': _frame_dict(df.describe()),
+        'data_types': _dtype_names(df),
+        'missing_values': _series_dict(missing_counts),
         'shape': {'rows': len(df), 'columns': len(df.columns)},
         'message': 'Basic analysis performed - intelligent EDA not available'
     }
 
-def generate_comprehensive_insights(df: pd.DataFrame, eda_results: Dict[str, Any]) -> List[Dict[str, str]]:
-    """Generate comprehensive insights based on EDA results"""
+# JSON-ready equivalents of the pandas to_dict() calls above: values are unboxed in
+# one bulk tolist() per frame instead of one Python object per cell
+
+def _frame_dict(frame: pd.DataFrame) -> Dict[Any, Dict[Any, Any]]:
+    """frame.to_dict(): {column: {index label: value}}"""
+    return {col: dict(zip(frame.index, values))
+            for col, values in zip(frame.columns, frame.to_numpy().T.tolist())}
+
+def _series_dict(series: pd.Series) -> Dict[Any, Any]:
+    """series.to_dict(): {index label: value}"""
+    return dict(zip(series.index, series.tolist()))
+
+def _dtype_names(df: pd.DataFrame) -> Dict[Any, str]:
+    """df.dtypes.astype(str).to_dict(): {column: dtype name}"""
+    return {col: str(dtype) for col, dtype in df.dtypes.items()}
+
+def generate_comprehensive_insights(df: pd.DataFrame, eda_results: Dict[str, Any],
+                                    missing_counts: Optional[pd.Series] = None) -> List[Dict[str, str]]:
+    """
+    Generate comprehensive insights based on EDA results
+    
+    missing_counts (df.isna().sum()) can be passed when the caller already has it.
+    """
     
     insights = []
     
@@ -198,7 +475,9 @@ def generate_comprehensive_insights(df: pd.DataFrame, eda_results: Dict[str, Any
             })
     
     # Add data quality insights
-    missing_pct = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+    if missing_counts is None:
+        missing_counts = df.isna().sum()
+    missing_pct = (missing_counts.sum() / (len(df) * len(df.columns))) * 100
     if missing_pct > 10:
         insights.append({
             'type': 'data_quality',
@@ -241,7 +520,7 @@ def convert_to_dataframe(data: Union[str, List[Dict[str, Any]]]) -> pd.DataFrame
     if isinstance(data, str):
         # Assume it's a CSV string
         try:
-            return pd.read_csv(pd.StringIO(data))
+            return read_csv_text(data)
         except Exception as e:
             logger.error(f"Failed to parse CSV string: {str(e)}")
             raise ValueError(f"Invalid CSV format: {str(e)}")
@@ -259,74 +538,207 @@ def apply_preprocessing(df: pd.DataFrame, rules: str) -> pd.DataFrame:
     """Apply preprocessing rules to the DataFrame"""
     logger.info(f"Applying preprocessing rules: {rules}")
     
-    # Create a copy to avoid modifying the original
-    processed_df = df.copy()
-    
-    # Parse and apply rules
-    if 'remove_empty_rows' in rules.lower():
-        processed_df = processed_df.dropna(how='all')
-    
-    if 'remove_empty_columns' in rules.lower():
-        processed_df = processed_df.dropna(axis=1, how='all')
-    
-    if 'trim_strings' in rules.lower():
-        # Trim whitespace from string columns
-        for col in processed_df.select_dtypes(include=['object']).columns:
-            processed_df[col] = processed_df[col].str.strip() if hasattr(processed_df[col], 'str') else processed_df[col]
-    
-    if 'convert_types' in rules.lower():
-        # Try to convert object columns to numeric if possible
-        for col in processed_df.select_dtypes(include=['object']).columns:
-            try:
-                processed_df[col] = pd.to_numeric(processed_df[col])
-            except:
-                # If conversion fails, keep as is
-                pass
-    
-    # Detecting and applying custom rules
-    rule_lines = rules.split('\n')
-    for line in rule_lines:
-        line = line.strip()
-        
-        # Normalize case rule
-        if line.startswith('normalize_case:'):
-            col_name = line.split(':', 1)[1].strip()
-            if col_name in processed_df.columns:
-                processed_df[col_name] = processed_df[col_name].str.lower() if hasattr(processed_df[col_name], 'str') else processed_df[col_name]
-        
-        # Replace value rule
-        elif line.startswith('replace:'):
-            parts = line.split(':', 2)
-            if len(parts) == 3:
-                col_name = parts[1].strip()
-                values = parts[2].split('|')
-                if len(values) == 2 and col_name in processed_df.columns:
-                    old_val, new_val = values[0].strip(), values[1].strip()
-                    processed_df[col_name] = processed_df[col_name].replace(old_val, new_val)
-    
-    # Remove duplicates
-    initial_rows = len(processed_df)
-    processed_df = processed_df.drop_duplicates()
-    logger.info(f"Removed {initial_rows - len(processed_df)} duplicate rows")
+    # Create a copy to avoid modifying the original. With Copy-on-Write a shallow copy
+    # is enough: a column's data is only copied when a rule actually writes to it
+    processed_df = df.copy(deep=not _copy_on_write())
+    
+    for step in compile_preprocessing(rules):
+        processed_df = step(processed_df)
     
     return processed_df
 
-def profile_data(df: pd.DataFrame) -> Dict[str, Any]:
-    """Generate comprehensive profile of the dataset"""
+def _copy_on_write() -> bool:
+    """Whether pandas Copy-on-Write is in effect"""
+    return PANDAS_COPY_ON_WRITE_DEFAULT or pd.get_option('mode.copy_on_write') is True
+
+@functools.lru_cache(maxsize=256)
+def compile_preprocessing(rules: str) -> Tuple[Callable[[pd.DataFrame], pd.DataFrame], ...]:
+    """
+    Turn a rules string into the steps apply_preprocessing runs, in order. The rules
+    are parsed once per distinct string; applying them is then just running the steps.
+    """
+    flags = set(BASIC_RULE_PATTERN.findall(rules.lower()))
+    normalize_columns, replace_map = parse_column_rules(rules)
+    
+    steps = []
+    if 'remove_empty_rows' in flags:
+        steps.append(_drop_empty_rows)
+    if 'remove_empty_columns' in flags:
+        steps.append(_drop_empty_columns)
+    if 'trim_strings' in flags:
+        steps.append(_trim_strings)
+    if 'convert_types' in flags:
+        steps.append(_convert_numeric_strings)
+    
+    # Custom column rules
+    if normalize_columns:
+        steps.append(functools.partial(_normalize_case, columns=normalize_columns))
+    if replace_map:
+        steps.append(functools.partial(_replace_values, replace_map=replace_map))
+    
+    steps.append(_drop_duplicate_rows)
+    return tuple(steps)
+
+def _drop_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df.dropna(how='all')
+
+def _drop_empty_columns(df: pd.DataFrame) -> pd.DataFrame:
+    return df.dropna(axis=1, how='all')
+
+def _trim_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Trim whitespace from all string columns in one pass"""
+    text_columns = df.select_dtypes(include=TEXT_DTYPES).columns
+    if len(text_columns):
+        df[text_columns] = _apply_by_column(df[text_columns], _str_method, 'strip')
+    return df
+
+def _convert_numeric_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert string columns whose every value is numeric (or empty)"""
+    text_columns = df.select_dtypes(include=TEXT_DTYPES).columns
+    if len(text_columns):
+        text_df = df[text_columns]
+        converted = _apply_by_column(text_df, pd.to_numeric, errors='coerce')
+        numeric = (converted.notna() | text_df.isna() | text_df.eq('')).all()
+        numeric_columns = numeric.index[numeric]
+        if len(numeric_columns):
+            df[numeric_columns] = converted[numeric_columns]
+    return df
+
+def _normalize_case(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    columns = [col for col in columns if col in df.columns]
+    if columns:
+        df[columns] = _apply_by_column(df[columns], _str_method, 'lower')
+    return df
+
+def _replace_values(df: pd.DataFrame, replace_map: Dict[str, Dict[str, str]]) -> pd.DataFrame:
+    replace_map = {col: values for col, values in replace_map.items() if col in df.columns}
+    return df.replace(replace_map) if replace_map else df
+
+def _drop_duplicate_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Remove duplicate rows (the frame is only filtered when there are any)"""
+    duplicates = df.duplicated()
+    duplicate_count = int(duplicates.sum())
+    if duplicate_count:
+        df = df[~duplicates]
+    logger.info(f"Removed {duplicate_count} duplicate rows")
+    return df
+
+def parse_column_rules(rules: str) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
+    """
+    Collect the per-column rule lines:
+        normalize_case: column        lower-case a column
+        replace: column: old | new    replace a value in a column
+    
+    Returns (columns to normalize, {column: {old: new}} replacements)
+    """
+    normalize_columns = []
+    replace_map: Dict[str, Dict[str, str]] = {}
+    
+    for match in COLUMN_RULE_PATTERN.finditer(rules):
+        op, body = match.group(1), match.group(2)
+        
+        if op == 'normalize_case':
+            col_name = body.strip()
+            if col_name not in normalize_columns:
+                normalize_columns.append(col_name)
+        
+        else:
+            parts = body.split(':', 1)
+            if len(parts) == 2:
+                col_name = parts[0].strip()
+                values = parts[1].split('|')
+                if len(values) == 2:
+                    replace_map.setdefault(col_name, {})[values[0].strip()] = values[1].strip()
+    
+    return normalize_columns, replace_map
+
+def _apply_by_column(frame: pd.DataFrame, func: Callable[..., pd.Series], *args: Any, **kwargs: Any) -> pd.DataFrame:
+    """
+    frame.apply(func, args=args, **kwargs), fanned out over threads for wide frames
+    (Arrow-backed string kernels and to_numeric's parser release the GIL)
+    """
+    if len(frame.columns) < PROFILE_PARALLEL_MIN_COLUMNS or PROFILE_WORKERS <= 1:
+        return frame.apply(func, args=args, **kwargs)
+    
+    columns = _map_on_threads(lambda i: func(frame.iloc[:, i], *args, **kwargs), range(len(frame.columns)), 'preprocess')
+    result = pd.concat(columns, axis=1)
+    result.columns = frame.columns
+    return result
+
+def _str_method(series: pd.Series, method: str) -> pd.Series:
+    """Apply a .str method to a column, leaving columns without string values unchanged"""
+    try:
+        return getattr(series.str, method)()
+    except AttributeError:
+        return series
+
+def preprocess_dataframe(df: pd.DataFrame, rules_config: Dict[str, Any]) -> pd.DataFrame:
+    """Apply the basic preprocessing rules followed by any expression rules"""
+    processed_df = apply_preprocessing(df, rules_config.get('rules', ''))
+    
+    if rules_config.get('expressions'):
+        processed_df = apply_expression_rules(processed_df, rules_config['expressions'])
+    
+    return processed_df
+
+def apply_expression_rules(df: pd.DataFrame, expressions: List[tuple]) -> pd.DataFrame:
+    """
+    Evaluate expression rules with DataFrame.eval/query on the numexpr engine
+    
+    Supported grammar, one rule per line:
+        compute: target = expression   e.g. "compute: margin = (revenue - cost) / revenue"
+        filter: expression             e.g. "filter: quantity > 0 and region != 'Test'"
+    
+    Expressions may use column names (backticks for names with spaces), numeric and
+    string literals, + - * / ** %, comparisons, and/or/not, and the numexpr functions
+    (abs, sqrt, log, exp, sin, cos, where, ...). The rules are request input, so they
+    are never run on pandas' python engine: rules numexpr can't evaluate (e.g. string
+    methods), rules using @, attribute access or dunder names, and invalid rules are
+    reported as unsupported and skipped.
+    """
+    for target, expression in expressions:
+        if not NUMEXPR_AVAILABLE or UNSAFE_EXPRESSION_PATTERN.search(expression):
+            logger.warning(f"Skipping unsupported preprocessing rule '{expression}'")
+            continue
+        try:
+            df = _eval_expression_rule(df, target, expression)
+        except Exception as e:
+            logger.warning(f"Skipping unsupported preprocessing rule '{expression}': {str(e)}")
+    
+    return df
+
+def _eval_expression_rule(df: pd.DataFrame, target: Optional[str], expression: str) -> pd.DataFrame:
+    """Apply one expression rule, returning a new DataFrame"""
+    if target is None:
+        return df.query(expression, engine='numexpr')
+    
+    return df.assign(**{target: df.eval(expression, engine='numexpr')})
+
+def profile_data(df: pd.DataFrame, duplicate_count: Optional[int] = None,
+                 missing_counts: Optional[pd.Series] = None) -> Dict[str, Any]:
+    """
+    Generate comprehensive profile of the dataset
+    
+    duplicate_count can be passed when the caller already knows it (e.g. 0 right after
+    apply_preprocessing has dropped duplicates) to skip the duplicate scan, and
+    missing_counts (df.isna().sum()) likewise skips the missing-value scan.
+    """
     profile = {}
     
     # Basic stats
     profile["row_count"] = len(df)
     profile["column_count"] = len(df.columns)
     
-    # Duplicate analysis
+    # Duplicate analysis (counted in one pass, without building a deduplicated copy)
     initial_rows = len(df)
-    deduplicated = df.drop_duplicates()
-    profile["duplicate_count"] = initial_rows - len(deduplicated)
+    if duplicate_count is None:
+        duplicate_count = int(df.duplicated().sum())
+    profile["duplicate_count"] = duplicate_count
     profile["duplicate_percentage"] = (profile["duplicate_count"] / initial_rows * 100) if initial_rows > 0 else 0
     
     # Missing values analysis
-    missing_counts = df.isna().sum()
+    if missing_counts is None:
+        missing_counts = df.isna().sum()
     missing_percentages = (missing_counts / len(df) * 100)
     profile["missing_values"] = {
         "total": int(missing_counts.sum()),
@@ -335,30 +747,44 @@ def profile_data(df: pd.DataFrame) -> Dict[str, Any]:
                      for col, count, pct in zip(df.columns, missing_counts, missing_percentages)}
     }
     
-    # Column profiles
-    profile["columns"] = {}
-    for col in df.columns:
-        col_profile = profile_column(df, col)
-        profile["columns"][col] = col_profile
-    
-    # Detect outliers
+    # Per-column statistics, computed for all columns at once. String columns are left
+    # out of nunique(): profile_column counts their values once for both figures.
+    # Numeric dtypes are ruled out as text without looking at the column's values.
+    text_mask = [not pd.api.types.is_numeric_dtype(dtype) and is_text_column(df.iloc[:, i])
+                 for i, dtype in enumerate(df.dtypes)]
+    unique_counts = df.loc[:, [not is_text for is_text in text_mask]].nunique()
     numeric_columns = df.select_dtypes(include=['number']).columns
+    numeric_values = df[numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    statistics = numeric_statistics(numeric_values)
+    numeric_summary = summarize_numeric_values(statistics, numeric_columns)
+    
+    # Column profiles (fanned out over threads for wide tables; the pandas/NumPy work
+    # inside profile_column releases the GIL)
+    column_stats = [(col, {"missing_count": missing_count, "unique_count": unique_counts.get(col),
+                           "summary": numeric_summary.get(col), "is_text": is_text})
+                    for col, missing_count, is_text in zip(df.columns, missing_counts, text_mask)]
+    if len(column_stats) >= PROFILE_PARALLEL_MIN_COLUMNS and PROFILE_WORKERS > 1:
+        column_profiles = _map_on_threads(lambda item: profile_column(df, *item), column_stats, 'profile')
+    else:
+        column_profiles = [profile_column(df, col, stats) for col, stats in column_stats]
+    profile["columns"] = {col: col_profile for (col, _), col_profile in zip(column_stats, column_profiles)}
+    
+    # Detect outliers with Tukey's fences, checking every numeric column in one pass
+    # (quartile vectors come from the numeric statistics)
     outlier_count = 0
     
-    for col in numeric_columns:
-        q1 = df[col].quantile(0.25)
-        q3 = df[col].quantile(0.75)
+    if len(numeric_columns):
+        q1, q3 = statistics["25%"], statistics["75%"]
         iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-        
-        outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)][col]
-        outlier_count += len(outliers)
+        lower_bounds = q1 - 1.5 * iqr
+        upper_bounds = q3 + 1.5 * iqr
+        outlier_counts = count_outliers(numeric_values, lower_bounds, upper_bounds)
+        outlier_count = int(outlier_counts.sum())
         
-        if col in profile["columns"]:
+        for col, col_outliers, lower_bound, upper_bound in zip(numeric_columns, outlier_counts, lower_bounds, upper_bounds):
             profile["columns"][col]["outliers"] = {
-                "count": len(outliers),
-                "percentage": len(outliers) / len(df) * 100 if len(df) > 0 else 0,
+                "count": int(col_outliers),
+                "percentage": int(col_outliers) / len(df) * 100 if len(df) > 0 else 0,
                 "lower_bound": float(lower_bound),
                 "upper_bound": float(upper_bound)
             }
@@ -367,17 +793,71 @@ def profile_data(df: pd.DataFrame) -> Dict[str, Any]:
     
     return profile
 
-def profile_column(df: pd.DataFrame, column: str) -> Dict[str, Any]:
-    """Generate profile for a specific column"""
+# Statistic names produced by numeric_statistics (the same labels DataFrame.describe uses)
+NUMERIC_STATISTICS = ("count", "mean", "std", "min", "25%", "50%", "75%", "max")
+
+def numeric_statistics(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    describe()-style statistics for every column of a 2-D float64 array at once, as
+    {statistic: array with one entry per column}
+    """
+    if values.shape[1] == 0:
+        return {name: np.empty(0) for name in NUMERIC_STATISTICS}
+    
+    # The kernels walk one column at a time, so column-major is the cache-friendly layout
+    # (and what DataFrame.to_numpy usually returns already, making this a no-op)
+    count, mean, std, low, high = numeric_column_moments(np.asfortranarray(values))
+    if values.shape[0] > 0:
+        with warnings.catch_warnings():
+            # All-NaN columns just get NaN quartiles
+            warnings.simplefilter('ignore', RuntimeWarning)
+            q1, median, q3 = np.nanpercentile(values, [25, 50, 75], axis=0)
+    else:
+        q1 = median = q3 = np.full(values.shape[1], np.nan)
+    
+    return dict(zip(NUMERIC_STATISTICS, (count, mean, std, low, q1, median, q3, high)))
+
+def summarize_numeric_values(statistics: Dict[str, np.ndarray], columns: List[str]) -> Dict[str, Dict[str, float]]:
+    """Regroup numeric_statistics output per column: {column: {statistic: value}}"""
+    per_statistic = [statistics[name].tolist() for name in NUMERIC_STATISTICS]
+    return {col: dict(zip(NUMERIC_STATISTICS, column_values))
+            for col, column_values in zip(columns, zip(*per_statistic))}
+
+def is_text_column(col_data: pd.Series) -> bool:
+    """Whether profile_column treats a column as text"""
+    return not pd.api.types.is_numeric_dtype(col_data) and pd.api.types.is_string_dtype(col_data)
+
+def profile_column(df: pd.DataFrame, column: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Generate profile for a specific column
+    
+    stats may carry values profile_data already computed for every column:
+    "missing_count", "unique_count", "summary" (the column's describe() output
+    for numeric columns) and "is_text" (is_text_column). Anything missing is
+    computed from the column.
+    """
     col_data = df[column]
+    stats = stats or {}
     profile = {}
     
+    is_text = stats.get("is_text")
+    if is_text is None:
+        is_text = is_text_column(col_data)
+    
+    # One hash pass over string columns gives both the unique count and the top values
+    # (left unsorted: only the top few are needed, and nlargest selects them without a full sort)
+    value_counts = col_data.value_counts(sort=False, dropna=True) if is_text else None
+    
     # Basic info
     profile["name"] = column
     profile["count"] = len(col_data)
-    profile["missing_count"] = int(col_data.isna().sum())
+    missing_count = stats.get("missing_count")
+    profile["missing_count"] = int(col_data.isna().sum() if missing_count is None else missing_count)
     profile["missing_percentage"] = profile["missing_count"] / profile["count"] * 100 if profile["count"] > 0 else 0
-    profile["unique_count"] = int(col_data.nunique())
+    unique_count = stats.get("unique_count")
+    if unique_count is None:
+        unique_count = len(value_counts) if value_counts is not None else col_data.nunique()
+    profile["unique_count"] = int(unique_count)
     profile["unique_percentage"] = profile["unique_count"] / profile["count"] * 100 if profile["count"] > 0 else 0
     
     # Determine data type
@@ -385,25 +865,32 @@ def profile_column(df: pd.DataFrame, column: str) -> Dict[str, Any]:
         profile["data_type"] = "numeric"
         
         # Add numeric-specific stats
-        profile["min"] = float(col_data.min()) if not pd.isna(col_data.min()) else None
-        profile["max"] = float(col_data.max()) if not pd.isna(col_data.max()) else None
-        profile["mean"] = float(col_data.mean()) if not pd.isna(col_data.mean()) else None
-        profile["median"] = float(col_data.median()) if not pd.isna(col_data.median()) else None
-        profile["std"] = float(col_data.std()) if not pd.isna(col_data.std()) else None
+        summary = stats.get("summary")
+        if summary is None:
+            # Same single-pass kernel profile_data uses, on just this column
+            values = col_data.to_numpy(dtype=np.float64, na_value=np.nan).reshape(-1, 1)
+            summary = summarize_numeric_values(numeric_statistics(values), [column])[column]
+        # Summary values are plain floats (NaN when undefined), so math.isnan is enough
+        for key, statistic in (("min", "min"), ("max", "max"), ("mean", "mean"), ("median", "50%"), ("std", "std")):
+            value = float(summary[statistic])
+            profile[key] = None if math.isnan(value) else value
         
         # Determine if likely ID column
         profile["is_likely_id"] = (profile["unique_percentage"] > 90 and 
                                   profile["missing_percentage"] < 5)
         
-    elif pd.api.types.is_string_dtype(col_data):
+    elif value_counts is not None:
         profile["data_type"] = "string"
         
-        # Add string-specific stats
-        non_null_values = col_data.dropna()
-        if len(non_null_values) > 0:
-            profile["min_length"] = int(min(non_null_values.str.len()))
-            profile["max_length"] = int(max(non_null_values.str.len()))
-            profile["avg_length"] = float(non_null_values.str.len().mean())
+        # Add string-specific stats. Lengths are measured once per distinct value and
+        # weighted by how often it occurs, rather than once per row.
+        lengths = value_counts.index.str.len().to_numpy(dtype=np.float64, na_value=np.nan)
+        measured = ~np.isnan(lengths)
+        if measured.any():
+            lengths = lengths[measured]
+            profile["min_length"] = int(lengths.min())
+            profile["max_length"] = int(lengths.max())
+            profile["avg_length"] = float(np.average(lengths, weights=value_counts.to_numpy()[measured]))
         else:
             profile["min_length"] = 0
             profile["max_length"] = 0
@@ -415,21 +902,20 @@ def profile_column(df: pd.DataFrame, column: str) -> Dict[str, Any]:
         
         # Get top categories if categorical
         if profile["is_categorical"]:
-            value_counts = col_data.value_counts(dropna=True)
-            top_n = min(10, len(value_counts))
             profile["top_values"] = [{"value": str(val), "count": int(count)} 
-                                    for val, count in value_counts.head(top_n).items()]
+                                    for val, count in value_counts.nlargest(10).items()]
     
     elif pd.api.types.is_datetime64_dtype(col_data):
         profile["data_type"] = "datetime"
         
         # Add datetime-specific stats
-        profile["min"] = col_data.min().isoformat() if not pd.isna(col_data.min()) else None
-        profile["max"] = col_data.max().isoformat() if not pd.isna(col_data.max()) else None
+        col_min, col_max = col_data.min(), col_data.max()
+        profile["min"] = col_min.isoformat() if not pd.isna(col_min) else None
+        profile["max"] = col_max.isoformat() if not pd.isna(col_max) else None
         
         # Calculate range in days
-        if not pd.isna(col_data.min()) and not pd.isna(col_data.max()):
-            profile["range_days"] = (col_data.max() - col_data.min()).days
+        if not pd.isna(col_min) and not pd.isna(col_max):
+            profile["range_days"] = (col_max - col_min).days
         else:
             profile["range_days"] = None
     
@@ -438,22 +924,44 @@ def profile_column(df: pd.DataFrame, column: str) -> Dict[str, Any]:
     
     return profile
 
+def summarize_for_prompt(df: pd.DataFrame) -> str:
+    """Compact text description of a dataset for LLM prompts: schema, statistics and a sample"""
+    subset = df.iloc[:, :AI_INSIGHTS_MAX_COLUMNS]
+    schema = ", ".join(f"{col} ({dtype})" for col, dtype in zip(subset.columns, subset.dtypes.astype(str)))
+    statistics = subset.describe(include='all').to_csv(float_format='%.4g')
+    sample = subset.head(AI_INSIGHTS_SAMPLE_ROWS).to_csv(index=False)
+    
+    return f"""Rows: {len(df)}, columns: {len(df.columns)}
+Columns: {schema}
+
+Summary statistics:
+{statistics}
+Example rows:
+{sample}"""
+
 def generate_ai_insights(df: pd.DataFrame, domain_info: Dict[str, Any]) -> List[Dict[str, str]]:
     """Generate AI-enhanced insights using OpenAI with domain context"""
+    if df.empty:
+        return [{
+            "title": "Insufficient Data",
+            "description": "The dataset has no values to analyze.",
+            "recommendation": "Upload a dataset with at least one row of data."
+        }]
+    
     try:
-        # Prepare data sample for OpenAI
-        data_sample = df.head(50).to_csv(index=False)
+        # Describe the dataset for OpenAI
+        data_summary = summarize_for_prompt(df)
         
         # Create prompt with domain information
         prompt = f"""
 You are a data analysis expert specializing in {domain_info['domain']} datasets.
-Analyze this dataset sample and provide 3-5 key insights that would be valuable to users.
+Analyze this dataset and provide 3-5 key insights that would be valuable to users.
 
 Domain: {domain_info['domain']}
 Domain reason: {domain_info['reason']}
 
-Dataset sample:
-{data_sample}
+Dataset:
+{data_summary}
 
 For each insight, provide:
 1. A concise title
@@ -474,12 +982,21 @@ Format as JSON with this structure:
 ]
 """
         
+        cache_key = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).hexdigest()
+        if AI_INSIGHTS_CACHE_SIZE > 0:
+            with _insights_cache_lock:
+                cached = _insights_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached AI insights")
+                return copy.deepcopy(cached)
+        
         # Call OpenAI API
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
-            temperature=0.2
+            temperature=0.2,
+            max_tokens=AI_INSIGHTS_MAX_TOKENS
         )
         
         # Extract and parse insights
@@ -503,6 +1020,10 @@ Format as JSON with this structure:
                         "recommendation": insight.get("recommendation", "")
                     })
             
+            if AI_INSIGHTS_CACHE_SIZE > 0:
+                with _insights_cache_lock:
+                    _insights_cache[cache_key] = copy.deepcopy(validated_insights)
+            
             return validated_insights
         
         except json.JSONDecodeError:
@@ -529,24 +1050,29 @@ def fallback_insights(df: pd.DataFrame, domain_info: Dict[str, Any]) -> List[Dic
         "type": "error"
     }]
 
+def _matching_columns(columns: List[str], pattern: 're.Pattern[str]') -> List[str]:
+    """Columns whose name contains any of the pattern's keywords"""
+    return [col for col in columns if pattern.search(str(col))]
+
 def generate_visualizations(df: pd.DataFrame, domain_info: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Generate visualization suggestions based on data and domain"""
     visualizations = []
+    if df.empty:
+        return visualizations
     domain = domain_info["domain"].lower()
     
-    # Get lists of columns by type
+    # Get lists of columns by type (unique counts only for the non-numeric columns, in one call)
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = [col for col in df.columns if df[col].nunique() < 15 and col not in numeric_cols]
+    unique_counts = df.select_dtypes(exclude=['number']).nunique()
+    categorical_cols = unique_counts.index[unique_counts < 15].tolist()
     
     # Look for time-related columns
-    time_cols = [col for col in df.columns if any(kw in col.lower() for kw in 
-                                               ['date', 'time', 'year', 'month', 'day'])]
+    time_cols = _matching_columns(df.columns, TIME_COLUMN_PATTERN)
     
     # Domain-specific visualizations
     if domain == 'nutrition':
         # Nutrition comparison chart
-        nutrition_cols = [col for col in numeric_cols if any(kw in col.lower() for kw in 
-                                                           ['calorie', 'protein', 'fat', 'carb', 'sugar'])]
+        nutrition_cols = _matching_columns(numeric_cols, NUTRITION_COLUMN_PATTERN)
         if nutrition_cols and categorical_cols:
             # Find a good category column (like food name)
             category_col = categorical_cols[0]
@@ -571,8 +1097,7 @@ def generate_visualizations(df: pd.DataFrame, domain_info: Dict[str, Any]) -> Li
     
     elif domain == 'financial' or domain == 'sales':
         # Financial metrics over time
-        financial_cols = [col for col in numeric_cols if any(kw in col.lower() for kw in 
-                                                           ['price', 'revenue', 'cost', 'amount', 'sale'])]
+        financial_cols = _matching_columns(numeric_cols, FINANCIAL_COLUMN_PATTERN)
         
         if financial_cols and time_cols:
             time_col = time_cols[0]
@@ -613,8 +1138,7 @@ def generate_visualizations(df: pd.DataFrame, domain_info: Dict[str, Any]) -> Li
     
     elif domain == 'healthcare':
         # Healthcare-specific visualizations
-        health_metrics = [col for col in numeric_cols if any(kw in col.lower() for kw in 
-                                                           ['age', 'weight', 'height', 'bmi', 'pressure', 'rate'])]
+        health_metrics = _matching_columns(numeric_cols, HEALTH_COLUMN_PATTERN)
         
         if health_metrics and len(health_metrics) >= 2:
             # Scatter plot for correlation between health metrics
@@ -677,154 +1201,206 @@ def generate_visualizations(df: pd.DataFrame, domain_info: Dict[str, Any]) -> Li
     return visualizations
 
 # Helper functions for visualization data preparation
+def group_aggregate(df: pd.DataFrame, key: str, value_cols: List[str], how: str, sort: bool = True) -> pd.DataFrame:
+    """
+    df.groupby(key, sort=sort, observed=True)[value_cols].<how>().reset_index() for how
+    in ('sum', 'mean'): one row per non-null key, sorted by key unless sort is False.
+    Large frames with plain numeric value columns are aggregated by Arrow; anything Arrow
+    can't take (mixed-type keys, bool or object values) goes through pandas. Categorical
+    keys are grouped by their codes, and only categories that occur get a row.
+    """
+    if (PYARROW_AVAILABLE and PROFILE_WORKERS > 1 and len(df) >= ARROW_GROUPBY_MIN_ROWS
+            and all(pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+                    for col in value_cols)):
+        try:
+            table = pa.Table.from_pandas(df[[key, *value_cols]], preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass
+        else:
+            table = table.filter(pc.is_valid(table[key]))
+            # min_count=0: an all-missing group sums to 0, as in pandas
+            options = pc.ScalarAggregateOptions(skip_nulls=True, min_count=0 if how == 'sum' else 1)
+            aggregated = table.group_by(key).aggregate([(col, how, options) for col in value_cols])
+            grouped = aggregated.to_pandas().rename(columns={f"{col}_{how}": col for col in value_cols})
+            grouped = grouped[[key, *value_cols]]
+            return grouped.sort_values(key, ignore_index=True) if sort else grouped
+    
+    grouped = df.groupby(key, sort=sort, observed=True)[value_cols]
+    return getattr(grouped, how)().reset_index()
+
 def prepare_visualization_data(df: pd.DataFrame, category_col: str, value_cols: List[str], limit: int = 10) -> List[Dict]:
     """Prepare data for multi-series bar chart"""
     # Group by category and calculate means for each value column
-    grouped = df.groupby(category_col)[value_cols].mean().reset_index()
+    grouped = group_aggregate(df, category_col, value_cols, 'mean')
     
-    # Limit to top categories by the first value column
+    # Limit to top categories by the first value column (each category is one row, so
+    # the top rows are selected directly, kept in category order)
     if len(grouped) > limit:
-        top_categories = grouped.nlargest(limit, value_cols[0])[category_col].tolist()
-        grouped = grouped[grouped[category_col].isin(top_categories)]
+        grouped = grouped.nlargest(limit, value_cols[0]).sort_index()
     
     # Transform to required format
-    result = []
-    for _, row in grouped.iterrows():
-        item = {"category": str(row[category_col])}
-        for col in value_cols:
-            item[col] = float(row[col])
-        result.append(item)
-    
-    return result
+    return _series_records(grouped, category_col, value_cols)
 
 def prepare_radar_data(df: pd.DataFrame, category_col: str, value_cols: List[str], limit: int = 5) -> List[Dict]:
     """Prepare data for radar chart"""
     # Group by category and calculate means for each value column
-    grouped = df.groupby(category_col)[value_cols].mean().reset_index()
+    grouped = group_aggregate(df, category_col, value_cols, 'mean')
     
     # Limit to top categories by the sum of all value columns
     if len(grouped) > limit:
-        grouped['total'] = grouped[value_cols].sum(axis=1)
-        top_categories = grouped.nlargest(limit, 'total')[category_col].tolist()
-        grouped = grouped[grouped[category_col].isin(top_categories)]
+        totals = grouped[value_cols].sum(axis=1)
+        grouped = grouped.loc[totals.nlargest(limit).index.sort_values()]
     
     # Transform to required format
-    result = []
-    for _, row in grouped.iterrows():
-        item = {"category": str(row[category_col])}
-        for col in value_cols:
-            item[col] = float(row[col])
-        result.append(item)
-    
-    return result
+    return _series_records(grouped, category_col, value_cols)
 
 def prepare_time_series_data(df: pd.DataFrame, time_col: str, value_col: str) -> List[Dict]:
     """Prepare data for time series chart"""
-    # Check if we need to parse the time column
-    if pd.api.types.is_object_dtype(df[time_col]):
-        try:
-            df[time_col] = pd.to_datetime(df[time_col])
-        except:
-            pass
-    
-    # Group by time and calculate aggregate values
-    if pd.api.types.is_datetime64_dtype(df[time_col]):
-        df['year_month'] = df[time_col].dt.strftime('%Y-%m')
-        grouped = df.groupby('year_month')[value_col].sum().reset_index()
-        time_field = 'year_month'
-    else:
-        grouped = df.groupby(time_col)[value_col].sum().reset_index()
-        time_field = time_col
+    time_values = df[time_col]
     
-    # Transform to required format
-    result = []
-    for _, row in grouped.iterrows():
-        result.append({
-            "time": str(row[time_field]),
-            "value": float(row[value_col])
-        })
-    
-    # Sort by time
-    result.sort(key=lambda x: x["time"])
-    
-    return result
+    # Check if we need to parse the time column
+    if pd.api.types.is_object_dtype(time_values) or pd.api.types.is_string_dtype(time_values):
+        time_values = _parse_datetimes(time_values)
+    
+    # Group by month (integer period arithmetic, no per-row strftime) or by raw time value.
+    # Months of timezone-aware values are taken in their local time, as to_period does,
+    # without its per-call warning; the groupby already returns the months in order.
+    if pd.api.types.is_datetime64_any_dtype(time_values):
+        if isinstance(time_values.dtype, pd.DatetimeTZDtype):
+            time_values = time_values.dt.tz_localize(None)
+        grouped = df[value_col].groupby(time_values.dt.to_period('M')).sum()
+        return [{"time": str(period), "value": value}
+                for period, value in zip(grouped.index, grouped.astype(float).tolist())]
+    
+    grouped = df.groupby(time_col, observed=True)[value_col].sum()
+    
+    # Sort by the time labels as text, in pandas rather than on the output dicts
+    grouped.index = grouped.index.astype(str)
+    grouped = grouped.sort_index(kind='stable')
+    return [{"time": time, "value": value}
+            for time, value in zip(grouped.index.tolist(), grouped.astype(float).tolist())]
+
+def _parse_datetimes(values: pd.Series) -> pd.Series:
+    """
+    Parse date strings, trying pandas' C ISO 8601 parser before format inference;
+    values that don't parse either way are returned unchanged
+    """
+    try:
+        return pd.to_datetime(values, format='ISO8601')
+    except (ValueError, TypeError):
+        pass
+    try:
+        return pd.to_datetime(values)
+    except Exception:
+        return values
+
+def _sort_groups(grouped: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Order aggregated groups by key the way a sorted groupby would (mixed-type keys included)"""
+    codes, _ = pd.factorize(grouped[key], sort=True)
+    return grouped.iloc[np.argsort(codes)]
 
 def prepare_category_data(df: pd.DataFrame, category_col: str, value_col: str, limit: int = 10) -> List[Dict]:
     """Prepare data for category bar chart"""
-    # Group by category and sum values
-    grouped = df.groupby(category_col)[value_col].sum().reset_index()
+    # Group by category and sum values (groups are only put in category order when they
+    # are all shown; otherwise nlargest picks the top ones without sorting every group)
+    grouped = group_aggregate(df, category_col, [value_col], 'sum', sort=False)
     
     # Limit to top categories
     if len(grouped) > limit:
         grouped = grouped.nlargest(limit, value_col)
+    else:
+        grouped = _sort_groups(grouped, category_col)
     
     # Transform to required format
-    result = []
-    for _, row in grouped.iterrows():
-        result.append({
-            "category": str(row[category_col]),
-            "value": float(row[value_col])
-        })
-    
-    return result
+    return [{"category": category, "value": value}
+            for category, value in zip(grouped[category_col].astype(str).tolist(), grouped[value_col].astype(float).tolist())]
 
 def prepare_pie_data(df: pd.DataFrame, category_col: str, value_col: str, limit: int = 8) -> List[Dict]:
     """Prepare data for pie chart"""
-    # Group by category and sum values
-    grouped = df.groupby(category_col)[value_col].sum().reset_index()
-    
-    # Limit to top categories + "Other"
+    # Group by category and sum values (sorted by category only when every group is shown)
+    grouped = group_aggregate(df, category_col, [value_col], 'sum', sort=False)
+    
+    # Limit to top categories + "Other" (appended to the output records, no frame concat).
+    # grouped has a RangeIndex, so the top rows' labels are their positions and the
+    # remaining groups are summed in place under a mask, without matching category
+    # values or gathering them. (total - top is cheaper still, but loses the small
+    # groups' precision when a few categories dominate.)
     if len(grouped) > limit:
         top_categories = grouped.nlargest(limit-1, value_col)
-        other_sum = grouped[~grouped[category_col].isin(top_categories[category_col])][value_col].sum()
-        
-        # Add "Other" category
-        other_row = pd.DataFrame({category_col: ["Other"], value_col: [other_sum]})
-        grouped = pd.concat([top_categories, other_row])
+        rest = np.ones(len(grouped), dtype=bool)
+        rest[top_categories.index.to_numpy()] = False
+        other_sum = float(np.sum(grouped[value_col].to_numpy(dtype=np.float64), where=rest))
+    else:
+        top_categories = _sort_groups(grouped, category_col)
+        other_sum = None
     
     # Transform to required format
-    result = []
-    for _, row in grouped.iterrows():
-        result.append({
-            "category": str(row[category_col]),
-            "value": float(row[value_col])
-        })
-    
+    result = [{"category": category, "value": value}
+              for category, value in zip(top_categories[category_col].astype(str).tolist(),
+                                         top_categories[value_col].astype(float).tolist())]
+    if other_sum is not None:
+        result.append({"category": "Other", "value": other_sum})
     return result
 
 def prepare_scatter_data(df: pd.DataFrame, x_col: str, y_col: str, limit: int = 100) -> List[Dict]:
     """Prepare data for scatter plot"""
-    # Sample rows if dataset is too large
-    if len(df) > limit:
-        sample_df = df.sample(limit)
+    x = df[x_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    y = df[y_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    # Rows missing either coordinate (one mask, built in place)
+    missing = np.isnan(x)
+    missing |= np.isnan(y)
+    
+    # Take evenly spaced points if dataset is too large (deterministic, unlike a random
+    # sample); only the chosen points are gathered, not every complete row. When no row
+    # is missing a coordinate the positions are a plain range and aren't materialized.
+    if missing.any():
+        points = np.flatnonzero(~missing)
+        step = max(1, len(points) // limit)
+        points = points[::step][:limit]
     else:
-        sample_df = df
+        step = max(1, len(x) // limit)
+        points = slice(0, step * limit, step)
     
     # Transform to required format
-    result = []
-    for _, row in sample_df.iterrows():
-        if pd.notna(row[x_col]) and pd.notna(row[y_col]):
-            result.append({
-                "x": float(row[x_col]),
-                "y": float(row[y_col])
-            })
-    
-    return result
+    return [{"x": px, "y": py} for px, py in zip(x[points].tolist(), y[points].tolist())]
+
+def _series_records(grouped: pd.DataFrame, category_col: str, value_cols: List[str]) -> List[Dict]:
+    """Build {"category": ..., <value col>: ...} records column-wise (no per-row Series)"""
+    categories = grouped[category_col].astype(str).tolist()
+    columns = [grouped[col].astype(float).tolist() for col in value_cols]
+    return [{"category": category, **dict(zip(value_cols, values))}
+            for category, *values in zip(categories, *columns)]
 
 def prepare_histogram_data(df: pd.DataFrame, value_col: str, bins: int = 10) -> List[Dict]:
     """Prepare data for histogram"""
-    # Calculate histogram
-    hist, bin_edges = np.histogram(df[value_col].dropna(), bins=bins)
-    
-    # Transform to required format
-    result = []
-    for i in range(len(hist)):
-        result.append({
-            "bin": f"{bin_edges[i]:.1f} - {bin_edges[i+1]:.1f}",
-            "frequency": int(hist[i])
-        })
+    # Calculate histogram over the finite values (no intermediate Series, and no copy
+    # when every value is finite). With a given range and an int bin count numpy already
+    # bins by scaling instead of searching the edges.
+    values = df[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = np.isfinite(values)
+    if not finite.all():
+        values = values[finite]
+    if values.size == 0:
+        hist, bin_edges = np.histogram(values, bins=bins)
+    else:
+        # Pass the range so it isn't recomputed; equal bounds are widened as numpy does
+        low, high = float(values.min()), float(values.max())
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        bin_edges = np.linspace(low, high, bins + 1)
+        if FAST_HISTOGRAM_AVAILABLE and values.size >= FAST_HISTOGRAM_MIN_ROWS:
+            # histogram1d treats the range as half-open; numpy puts the maximum in the last bin
+            hist = histogram1d(values, bins=bins, range=(low, high)).astype(np.int64)
+            hist[-1] += np.count_nonzero(values == high)
+        else:
+            hist, bin_edges = np.histogram(values, bins=bins, range=(low, high))
     
-    return result
+    # Transform to required format; each edge is formatted once and shared by the two
+    # bins it bounds (np.char formatting measured slower than this for any bin count)
+    edges = [f"{edge:.1f}" for edge in bin_edges.tolist()]
+    return [{"bin": f"{low} - {high}", "frequency": count}
+            for low, high, count in zip(edges[:-1], edges[1:], hist.tolist())]
 
 def parse_enhanced_cleaning_config(preprocessing_rules: str) -> Dict[str, Any]:
     """
@@ -847,81 +1423,86 @@ def parse_enhanced_cleaning_config(preprocessing_rules: str) -> Dict[str, Any]:
         'handle_unit_conversions': False
     }
     
+    # No rules: the defaults apply
+    if not preprocessing_rules:
+        return config
+    
     rules_lower = preprocessing_rules.lower()
+    options = set(CLEANING_OPTION_PATTERN.findall(rules_lower))
     
     # Parse specific enhanced cleaning options
-    if 'standardize_data' in rules_lower or 'normalize_data' in rules_lower:
+    if 'standardize_data' in options or 'normalize_data' in options:
         config['standardize'] = True
         config['scaling_config'] = {'method': 'standard'}
-        if 'minmax' in rules_lower:
+        if 'minmax' in options:
             config['scaling_config']['method'] = 'minmax'
-        elif 'log_transform' in rules_lower:
+        elif 'log_transform' in options:
             config['scaling_config']['method'] = 'log'
-        elif 'boxcox' in rules_lower:
+        elif 'boxcox' in options:
             config['scaling_config']['method'] = 'boxcox'
     
-    if 'encode_categorical' in rules_lower:
+    if 'encode_categorical' in options:
         config['encode_categorical'] = True
         config['encoding_config'] = {'method': 'onehot', 'max_categories_onehot': 10}
-        if 'label_encoding' in rules_lower:
+        if 'label_encoding' in options:
             config['encoding_config']['method'] = 'label'
-        elif 'target_encoding' in rules_lower:
+        elif 'target_encoding' in options:
             config['encoding_config']['method'] = 'target'
-        elif 'frequency_encoding' in rules_lower:
+        elif 'frequency_encoding' in options:
             config['encoding_config']['method'] = 'frequency'
     
-    if 'create_bins' in rules_lower or 'binning' in rules_lower:
+    if 'create_bins' in options or 'binning' in options:
         config['create_bins'] = True
         # Default binning configuration
         config['binning_config'] = {
             'binning_rules': {}  # Would be populated based on specific column rules
         }
     
-    if 'feature_engineering' in rules_lower:
+    if 'feature_engineering' in options:
         config['feature_engineering'] = True
         config['feature_config'] = {
             'extract_date_features': True,
             'extract_text_features': False
         }
     
-    if 'missing_indicators' in rules_lower:
+    if 'missing_indicators' in options:
         config['missing_config'] = config.get('missing_config', {})
         config['missing_config']['create_missing_indicators'] = True
     
-    if 'knn_imputation' in rules_lower:
+    if 'knn_imputation' in options:
         config['missing_config'] = config.get('missing_config', {})
         config['missing_config']['use_knn_imputation'] = True
         config['missing_config']['knn_neighbors'] = 5
     
-    if 'zscore_outliers' in rules_lower:
+    if 'zscore_outliers' in options:
         config['outlier_config'] = {'method': 'zscore', 'action': 'cap'}
-    elif 'remove_outliers' in rules_lower:
+    elif 'remove_outliers' in options:
         config['outlier_config'] = {'method': 'iqr', 'action': 'remove'}
     
-    if 'geospatial' in rules_lower:
+    if 'geospatial' in options:
         config['clean_geospatial'] = True
     
     # Enhanced text cleaning options
-    if 'remove_html' in rules_lower:
+    if 'remove_html' in options:
         config['text_config'] = config.get('text_config', {})
         config['text_config']['remove_html_tags'] = True
     
-    if 'remove_emojis' in rules_lower:
+    if 'remove_emojis' in options:
         config['text_config'] = config.get('text_config', {})
         config['text_config']['remove_emojis'] = True
     
-    if 'advanced_text_cleaning' in rules_lower:
+    if 'advanced_text_cleaning' in options:
         config['text_config'] = config.get('text_config', {})
         config['text_config']['advanced_standardization'] = True
         config['text_config']['remove_punctuation'] = True
     
     # Unit conversion options
-    if 'unit_conversion' in rules_lower or 'convert_units' in rules_lower:
+    if 'unit_conversion' in options or 'convert_units' in options:
         config['handle_unit_conversions'] = True
         config['unit_conversion_config'] = {'auto_detect_units': True}
     
     # Parse missing value thresholds
-    threshold_match = re.search(r'missing_threshold[:\s]+(\d+\.?\d*)%?', rules_lower)
+    threshold_match = MISSING_THRESHOLD_PATTERN.search(rules_lower)
     if threshold_match:
         threshold = float(threshold_match.group(1))
         if threshold > 1:  # Assume percentage
@@ -0,0 +1,293 @@
+"""
+Shared-memory dataset store for the Python backend
+
+An uploaded table is written once as an Arrow IPC stream into a named
+multiprocessing.shared_memory block, and follow-up requests refer to it by
+dataset id instead of re-sending and re-parsing the rows. Any worker process on
+the same host can attach to the block by name. The process that stored a dataset
+unlinks it once its TTL has passed, or earlier when it needs the room for newer
+datasets (least recently used first, see DATASET_STORE_MAX_BYTES). Other processes
+keep their read mappings under the same cap and drop them once the block is unlinked.
+
+A dataset lives only as long as the worker process that stored it: when that worker
+exits (e.g. gunicorn restarts it), its blocks are unlinked and their ids answer 404
+in every worker, so clients must be ready to upload the dataset again.
+
+Block layout: 8-byte payload length, 8-byte expiry (unix time), then the IPC stream.
+"""
+
+import os
+import sys
+import shutil
+import time
+import uuid
+import struct
+import logging
+import threading
+from multiprocessing import shared_memory, resource_tracker
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Seconds a stored dataset stays available
+DATASET_TTL_SECONDS = int(os.environ.get('DATASET_TTL_SECONDS', 30 * 60))
+# Seconds between sweeps for expired datasets
+DATASET_SWEEP_INTERVAL = 60
+# Bytes of shared memory one process may hold in stored datasets, and separately in
+# datasets it has mapped for reading; the least recently used are evicted to make room
+# for new ones
+DATASET_STORE_MAX_BYTES = int(os.environ.get('DATASET_STORE_MAX_BYTES', 1024 * 1024 * 1024))
+
+_HEADER = struct.Struct('<Qd')
+_NAME_PREFIX = 'datalysis_'
+
+class DatasetNotFoundError(KeyError):
+    """Raised for unknown or expired dataset ids"""
+
+class DatasetStoreFullError(Exception):
+    """Raised when there is no room in shared memory for a dataset"""
+
+def _shm_free_bytes() -> Optional[int]:
+    """Free space for shared memory blocks, or None where it can't be measured"""
+    try:
+        return shutil.disk_usage('/dev/shm').free
+    except OSError:
+        return None
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing block without making this process responsible for unlinking it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    # Before 3.13 attaching also registers the block, and the resource tracker
+    # would unlink it when this process exits
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def _is_unlinked(name: str) -> bool:
+    """Whether a block has been unlinked by its owner (only detectable where /dev/shm exists)"""
+    return os.path.isdir('/dev/shm') and not os.path.exists(os.path.join('/dev/shm', name))
+
+def _read_table(shm: shared_memory.SharedMemory) -> pa.Table:
+    """Decode the Arrow IPC stream in a block without copying it"""
+    size, _ = _HEADER.unpack_from(shm.buf, 0)
+    buffer = pa.py_buffer(shm.buf[_HEADER.size:_HEADER.size + size])
+    return pa.ipc.open_stream(buffer).read_all()
+
+class DatasetStore:
+    """Store DataFrames in shared memory and look them up by dataset id"""
+
+    def __init__(self, ttl_seconds: int = DATASET_TTL_SECONDS, max_bytes: int = DATASET_STORE_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # Blocks created by this process, least recently used first, unlinked when they
+        # expire or are evicted
+        self._owned: 'OrderedDict[str, Tuple[shared_memory.SharedMemory, float]]' = OrderedDict()
+        self._owned_bytes = 0
+        # Blocks attached for reading, with the table decoded from them, least recently
+        # used first; they keep the memory in use after the owner unlinks the block, so
+        # they are dropped once it does and evicted to stay within max_bytes
+        self._attached: 'OrderedDict[str, Tuple[shared_memory.SharedMemory, pa.Table, float]]' = OrderedDict()
+        self._attached_bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def put(self, df: pd.DataFrame) -> str:
+        """
+        Write a DataFrame to shared memory and return its dataset id. Raises
+        DatasetStoreFullError if it doesn't fit even after evicting older datasets.
+        """
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        payload = sink.getvalue()
+
+        size = _HEADER.size + payload.size
+        if size > self.max_bytes:
+            raise DatasetStoreFullError(
+                f"Dataset of {size} bytes exceeds the store capacity of {self.max_bytes} bytes")
+
+        # Reserve the space, evicting the least recently used datasets to make room
+        evicted = []
+        with self._lock:
+            while self._owned and self._owned_bytes + size > self.max_bytes:
+                dataset_id, (shm, _) = self._owned.popitem(last=False)
+                self._owned_bytes -= shm.size
+                evicted.append((dataset_id, shm))
+            self._owned_bytes += size
+        self._release(evicted)
+
+        try:
+            free = _shm_free_bytes()
+            if free is not None and size > free:
+                raise DatasetStoreFullError(
+                    f"Dataset of {size} bytes exceeds the {free} bytes of shared memory left")
+
+            dataset_id = uuid.uuid4().hex
+            expires_at = time.time() + self.ttl_seconds
+            shm = shared_memory.SharedMemory(name=_NAME_PREFIX + dataset_id, create=True, size=size)
+        except Exception:
+            with self._lock:
+                self._owned_bytes -= size
+            raise
+
+        try:
+            _HEADER.pack_into(shm.buf, 0, payload.size, expires_at)
+            shm.buf[_HEADER.size:_HEADER.size + payload.size] = memoryview(payload).cast('B')
+        except Exception:
+            with self._lock:
+                self._owned_bytes -= size
+            shm.close()
+            shm.unlink()
+            raise
+
+        with self._lock:
+            # Account for the mapped size, which is what eviction subtracts
+            self._owned_bytes += shm.size - size
+            self._owned[dataset_id] = (shm, expires_at)
+        self._start_sweeper()
+        return dataset_id
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        """Return the stored dataset as a DataFrame, raising DatasetNotFoundError if it's gone"""
+        return self.get_table(dataset_id).to_pandas()
+
+    def get_table(self, dataset_id: str) -> pa.Table:
+        """Return the stored dataset as an Arrow table backed by the shared memory block"""
+        with self._lock:
+            owned = self._owned.get(dataset_id)
+            if owned is not None:
+                self._owned.move_to_end(dataset_id)
+            attached = self._attached.get(dataset_id)
+            if attached is not None:
+                self._attached.move_to_end(dataset_id)
+        
+        # Stored by this process: read the block it already has mapped
+        if owned is not None:
+            shm, expires_at = owned
+            if time.time() >= expires_at:
+                raise DatasetNotFoundError(dataset_id)
+            return _read_table(shm)
+        
+        if attached is not None:
+            _, table, expires_at = attached
+            if time.time() < expires_at and not _is_unlinked(_NAME_PREFIX + dataset_id):
+                return table
+            self._detach(dataset_id)
+            raise DatasetNotFoundError(dataset_id)
+
+        try:
+            shm = _attach(_NAME_PREFIX + dataset_id)
+        except (FileNotFoundError, ValueError):
+            raise DatasetNotFoundError(dataset_id)
+
+        _, expires_at = _HEADER.unpack_from(shm.buf, 0)
+        if time.time() >= expires_at:
+            shm.close()
+            raise DatasetNotFoundError(dataset_id)
+
+        table = _read_table(shm)
+        evicted = []
+        with self._lock:
+            existing = self._attached.get(dataset_id)
+            if existing is None:
+                self._attached[dataset_id] = (shm, table, expires_at)
+                self._attached_bytes += shm.size
+                # Make room by dropping the least recently used attachments (never the new one)
+                excess = self._attached_bytes - self.max_bytes
+                for attached_id, (attached_shm, _, _) in self._attached.items():
+                    if excess <= 0 or attached_id == dataset_id:
+                        break
+                    evicted.append(attached_id)
+                    excess -= attached_shm.size
+        
+        if existing is not None:
+            # Another thread attached it first; keep that mapping
+            table = None
+            try:
+                shm.close()
+            except BufferError:
+                pass
+            return existing[1]
+        
+        for attached_id in evicted:
+            self._detach(attached_id)
+        self._start_sweeper()
+        return table
+
+    def evict_expired(self) -> None:
+        """
+        Unlink expired datasets created by this process and drop attachments that have
+        expired or whose block has been unlinked by its owner
+        """
+        now = time.time()
+        with self._lock:
+            owned = [dataset_id for dataset_id, (_, expires_at) in self._owned.items() if now >= expires_at]
+            attached = [dataset_id for dataset_id, (_, _, expires_at) in self._attached.items()
+                        if now >= expires_at or _is_unlinked(_NAME_PREFIX + dataset_id)]
+
+        for dataset_id in attached:
+            self._detach(dataset_id)
+
+        expired = []
+        with self._lock:
+            for dataset_id in owned:
+                entry = self._owned.pop(dataset_id, None)
+                if entry is not None:
+                    self._owned_bytes -= entry[0].size
+                    expired.append((dataset_id, entry[0]))
+        self._release(expired)
+
+    @staticmethod
+    def _release(blocks: List[Tuple[str, shared_memory.SharedMemory]]) -> None:
+        """Unlink and unmap blocks created by this process"""
+        for dataset_id, shm in blocks:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                shm.close()
+            except BufferError:
+                # Still referenced by a table; unmapped when that is garbage collected
+                pass
+            logger.info(f"Evicted dataset {dataset_id}")
+
+    def _detach(self, dataset_id: str) -> None:
+        """Drop a read attachment; the block itself stays until its owner unlinks it"""
+        with self._lock:
+            attached = self._attached.pop(dataset_id, None)
+            if attached is not None:
+                self._attached_bytes -= attached[0].size
+        if attached is None:
+            return
+        shm = attached[0]
+        attached = None
+        try:
+            shm.close()
+        except BufferError:
+            # DataFrames built from the table may still reference the block; the
+            # mapping is released when they are garbage collected
+            pass
+
+    def _start_sweeper(self) -> None:
+        """Start the background eviction thread on first use"""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep, name='dataset-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def _sweep(self) -> None:
+        while True:
+            time.sleep(DATASET_SWEEP_INTERVAL)
+            try:
+                self.evict_expired()
+            except Exception as e:
+                logger.error(f"Error evicting datasets: {str(e)}")
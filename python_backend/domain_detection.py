@@ -8,12 +8,19 @@ from typing import List, Dict, Any, Optional, Union
 import os
 import json
 import re
+import copy
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from cachetools import LRUCache
 
-from langchain_community.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain_openai import ChatOpenAI
 
+from .openai_client import http_client, OPENAI_TIMEOUT
+
 # Constants for domain types
 DOMAIN_FINANCE = "Finance"
 DOMAIN_FOOD = "Food"
@@ -36,13 +43,32 @@ SUPPORTED_DOMAINS = [
     DOMAIN_GENERIC
 ]
 
-def detect_data_domain(columns: List[str], sample_values: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+# Rows of sample data considered for detection; more rows add no signal
+MAX_SAMPLE_ROWS = 500
+
+# Recent detections keyed by a hash of the prompt (columns + first sample rows), so
+# repeat uploads from the same source skip the LLM call
+DOMAIN_CACHE_SIZE = int(os.environ.get('DOMAIN_CACHE_SIZE', 256))
+_domain_cache = LRUCache(maxsize=max(DOMAIN_CACHE_SIZE, 1))
+_domain_cache_lock = threading.Lock()
+# Detections currently waiting on the LLM, so concurrent requests for the same prompt
+# share one call instead of each making their own
+_domain_pending: Dict[str, Future] = {}
+# Seconds a request waits on another request's detection before giving up with an error
+DOMAIN_WAIT_TIMEOUT = float(os.environ.get('DOMAIN_WAIT_TIMEOUT', OPENAI_TIMEOUT))
+
+# Decodes the first JSON object embedded in the model's reply text
+_json_decoder = json.JSONDecoder()
+
+def detect_data_domain(columns: List[str], sample_values: Optional[List[Dict[str, Any]]] = None,
+                       max_rows: int = MAX_SAMPLE_ROWS) -> Dict[str, Any]:
     """
     Detect the most likely domain for a dataset based on column names and optional sample values.
     
     Args:
         columns: List of column names from the dataset
         sample_values: Optional list of sample rows from the dataset
+        max_rows: Maximum number of sample rows to consider
         
     Returns:
         Dictionary containing domain classification details:
@@ -53,40 +79,81 @@ def detect_data_domain(columns: List[str], sample_values: Optional[List[Dict[str
             "features": List of detected domain features
         }
     """
+    # Nothing to classify; don't spend an LLM call on it
+    if not columns:
+        return {"domain": DOMAIN_GENERIC, "reason": "The dataset has no columns.", "confidence": 0.0, "features": []}
+    
     try:
+        if sample_values:
+            sample_values = sample_values[:max_rows]
+        
         # Format domain prompt with column names and sample data
         domain_prompt = _build_domain_prompt(columns, sample_values)
         
-        # Detect domain using LangChain/OpenAI
-        domain_result = _detect_with_langchain(domain_prompt)
+        cache_key = hashlib.blake2b(domain_prompt.encode('utf-8'), digest_size=16).hexdigest()
+        if DOMAIN_CACHE_SIZE <= 0:
+            return _detect_domain(domain_prompt, columns)
+        
+        with _domain_cache_lock:
+            cached = _domain_cache.get(cache_key)
+            pending = _domain_pending.get(cache_key) if cached is None else None
+            if cached is None and pending is None:
+                _domain_pending[cache_key] = owned = Future()
+        if cached is not None:
+            return copy.deepcopy(cached)
+        if pending is not None:
+            try:
+                return copy.deepcopy(pending.result(timeout=DOMAIN_WAIT_TIMEOUT))
+            except TimeoutError:
+                raise TimeoutError("timed out waiting for a detection of the same data") from None
         
-        # Extract domain info from result
-        domain_info = _parse_domain_result(domain_result, columns)
+        try:
+            domain_info = _detect_domain(domain_prompt, columns)
+        except BaseException as e:
+            # Also on cancellation (gevent.Timeout, GreenletExit), which the waiters get
+            # as an ordinary error
+            with _domain_cache_lock:
+                del _domain_pending[cache_key]
+            owned.set_exception(e if isinstance(e, Exception) else RuntimeError("Domain detection was interrupted"))
+            raise
         
+        with _domain_cache_lock:
+            # Don't pin a parse failure; the next request gets a fresh attempt
+            if not domain_info.get("reason", "").startswith("Error parsing"):
+                _domain_cache[cache_key] = copy.deepcopy(domain_info)
+            del _domain_pending[cache_key]
+        owned.set_result(copy.deepcopy(domain_info))
         return domain_info
     except Exception as e:
         print(f"Error in domain detection: {str(e)}")
         # Return error message instead of using fallback detection
         return {"domain": "Error", "reason": f"Unable to detect domain: {str(e)}. Please check API key configuration.", "confidence": 0.0, "features": []}
 
+def _detect_domain(domain_prompt: str, columns: List[str]) -> Dict[str, Any]:
+    """Run the LLM on a domain prompt and parse its answer"""
+    # Detect domain using LangChain/OpenAI
+    domain_result = _detect_with_langchain(domain_prompt)
+    
+    # Extract domain info from result
+    return _parse_domain_result(domain_result, columns)
+
+def _truncate_sample_value(value: str) -> str:
+    """Truncate very long sample values"""
+    return value[:97] + "..." if len(value) > 100 else value
+
 def _build_domain_prompt(columns: List[str], sample_values: Optional[List[Dict[str, Any]]] = None) -> str:
     """Build the prompt for domain detection"""
     column_list = ", ".join(columns)
     
-    # Format sample data for prompt
+    # Format sample data for prompt (each row's "col: value" pairs joined in one go)
     sample_data_str = ""
     if sample_values and len(sample_values) > 0:
-        sample_data_str = "Sample data rows:\n"
+        sample_lines = []
         for i, row in enumerate(sample_values[:3]):  # Include up to 3 sample rows
-            row_values = []
-            for col in columns:
-                if col in row:
-                    value = str(row[col])
-                    # Truncate very long values
-                    if len(value) > 100:
-                        value = value[:97] + "..."
-                    row_values.append(f"{col}: {value}")
-            sample_data_str += f"Row {i+1}: {', '.join(row_values)}\n"
+            row_values = ", ".join(f"{col}: {_truncate_sample_value(str(row[col]))}"
+                                   for col in columns if col in row)
+            sample_lines.append(f"Row {i+1}: {row_values}\n")
+        sample_data_str = "Sample data rows:\n" + "".join(sample_lines)
     
     return f"""You are a domain expert tasked with classifying a dataset based on its columns and sample data.
 
@@ -113,13 +180,14 @@ Provide your answer in JSON format:
   "features": ["list of domain-specific features or terms identified in the dataset"]
 }}"""
 
-def _detect_with_langchain(prompt: str) -> str:
-    """Use LangChain with OpenAI to detect domain"""
-    # Initialize the LLM
+def _build_domain_chain() -> LLMChain:
+    """Build the LangChain chain that sends a domain prompt to OpenAI as-is"""
+    # Initialize the LLM (on the shared connection pool)
     llm = ChatOpenAI(
         model_name="gpt-4o",
         temperature=0,
-        api_key=os.environ.get("OPENAI_API_KEY")
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        http_client=http_client
     )
     
     # Define template
@@ -128,22 +196,33 @@ def _detect_with_langchain(prompt: str) -> str:
         template="{prompt}"
     )
     
-    # Create chain
-    chain = LLMChain(llm=llm, prompt=template)
-    
-    # Run chain
-    result = chain.run(prompt=prompt)
-    
-    return result
+    return LLMChain(llm=llm, prompt=template)
+
+# Built on the first detection (not at import) and reused by every later one
+_domain_chain: Optional[LLMChain] = None
+_domain_chain_lock = threading.Lock()
+
+def _get_chain() -> LLMChain:
+    """The shared domain detection chain, built once under a lock"""
+    global _domain_chain
+    if _domain_chain is None:
+        with _domain_chain_lock:
+            if _domain_chain is None:
+                _domain_chain = _build_domain_chain()
+    return _domain_chain
+
+def _detect_with_langchain(prompt: str) -> str:
+    """Use LangChain with OpenAI to detect domain"""
+    return _get_chain().run(prompt=prompt)
 
 def _parse_domain_result(result: str, columns: List[str]) -> Dict[str, Any]:
     """Parse the domain detection result"""
     try:
-        # Extract JSON from result (in case there's additional text)
-        json_match = re.search(r'({[\s\S]*})', result)
-        if json_match:
-            json_str = json_match.group(1)
-            domain_info = json.loads(json_str)
+        # Decode the first JSON object in the result (in case there's additional text),
+        # stopping at its closing brace rather than scanning for the last one
+        start = result.find('{')
+        if start >= 0:
+            domain_info, _ = _json_decoder.raw_decode(result, start)
             
             # Validate and normalize the result
             if 'domain' not in domain_info or not domain_info['domain']:
@@ -153,18 +232,26 @@ def _parse_domain_result(result: str, columns: List[str]) -> Dict[str, Any]:
             if normalized_domain not in SUPPORTED_DOMAINS:
                 normalized_domain = "Generic"
             
-            # Ensure all required fields are present
-            if 'confidence' not in domain_info or not isinstance(domain_info['confidence'], (int, float)):
-                domain_info['confidence'] = 0.7
-            if 'features' not in domain_info or not isinstance(domain_info['features'], list):
-                domain_info['features'] = extract_features_from_reason(domain_info.get('reason', ''), columns)
+            # Ensure all required fields are present (each looked up once)
+            confidence = domain_info.get('confidence')
+            if not isinstance(confidence, (int, float)):
+                confidence = 0.7
+            reason = domain_info.get('reason')
+            features = domain_info.get('features')
+            if not isinstance(features, list):
+                features = extract_features_from_reason(reason if reason is not None else '', columns)
+            
+            # Clamp confidence to [0, 1]; NaN becomes 0
+            confidence = float(confidence)
+            if not 0.0 < confidence < 1.0:
+                confidence = 1.0 if confidence >= 1.0 else 0.0
             
             # Normalize response
             return {
                 "domain": normalized_domain,
-                "confidence": min(1.0, max(0.0, float(domain_info['confidence']))),
-                "reason": domain_info.get('reason', 'Domain detected based on column patterns'),
-                "features": domain_info['features']
+                "confidence": confidence,
+                "reason": reason if reason is not None else 'Domain detected based on column patterns',
+                "features": features
             }
         else:
             raise ValueError("No JSON found in response")
@@ -186,13 +273,12 @@ def extract_features_from_reason(reason: str, columns: List[str]) -> List[str]:
     quoted_terms = re.findall(r'"([^"]+)"', reason)
     features.extend(quoted_terms)
     
-    # Add column names that are explicitly mentioned in the reason
-    for col in columns:
-        if col.lower() in reason.lower():
-            features.append(col)
+    # Add column names that are explicitly mentioned in the reason (lower-cased once)
+    reason_lower = reason.lower()
+    features.extend(col for col in columns if col.lower() in reason_lower)
     
     # Remove duplicates and empty strings
-    features = list(set(feature for feature in features if feature.strip()))
+    features = list({feature for feature in features if feature.strip()})
     
     # If we still don't have features, add some column names as features
     if not features and columns:
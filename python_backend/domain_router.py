@@ -5,9 +5,13 @@ This module implements a LangChain-based router that directs data to
 domain-specific agents for specialized analysis.
 """
 
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 import os
 import json
+import hashlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Union
 
 # Handle pandas type hints without importing in the global scope
@@ -19,6 +23,9 @@ from langchain_community.chat_models import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
+import orjson
+from cachetools import LRUCache
+
 # Constants for domain types
 DOMAIN_FINANCE = "Finance"
 DOMAIN_FOOD = "Food"
@@ -41,220 +48,166 @@ SUPPORTED_DOMAINS = [
     DOMAIN_GENERIC
 ]
 
+# Set view of SUPPORTED_DOMAINS for constant-time membership checks
+SUPPORTED_DOMAIN_SET = frozenset(SUPPORTED_DOMAINS)
 
-class DomainRouter:
-    """
-    A router that directs data to domain-specific analysis agents.
-    """
-    
-    def __init__(self, model_name: str = "gpt-4o", temperature: float = 0):
-        """Initialize the domain router with LLM and chains."""
-        # Initialize the LLM
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=temperature,
-            api_key=os.environ.get("OPENAI_API_KEY")
-        )
-        
-        # Create domain-specific chains
-        self.chains = self._create_domain_chains()
-        
-    def _create_domain_chains(self) -> Dict[str, LLMChain]:
-        """Create LLMChains for each supported domain."""
-        chains = {}
-        
-        # Finance domain chain
-        finance_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are a financial data analyst expert. You analyze financial datasets to extract valuable insights.
-
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
-
-Question or Analysis Request: {question}
-
-Provide a detailed analysis with the following:
-1. A direct answer to the question 
-2. 3-5 key insights specific to financial data (trends, outliers, correlations)
-3. Financial metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for financial data
-
-Keep your analysis focused on financial aspects such as: revenue, expenses, profit margins, 
-ROI, cash flow, investments, stocks, assets, liabilities, and financial ratios.
-"""
-        )
-        chains[DOMAIN_FINANCE] = LLMChain(llm=self.llm, prompt=finance_prompt)
-        
-        # Food/Nutrition domain chain
-        food_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are a nutrition data analyst expert. You analyze food and nutrition datasets to extract valuable insights.
-
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
-
-Question or Analysis Request: {question}
-
-Provide a detailed analysis with the following:
-1. A direct answer to the question
-2. 3-5 key insights specific to nutrition data (nutritional patterns, health implications)
-3. Nutritional metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for food and nutrition data
-
-Keep your analysis focused on nutritional aspects such as: calories, macronutrients (protein, carbs, fat), 
-micronutrients (vitamins, minerals), food groups, dietary patterns, and health correlations.
-"""
-        )
-        chains[DOMAIN_FOOD] = LLMChain(llm=self.llm, prompt=food_prompt)
-        
-        # Sales domain chain
-        sales_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are a sales data analyst expert. You analyze sales datasets to extract valuable insights.
-
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
-
-Question or Analysis Request: {question}
-
-Provide a detailed analysis with the following:
-1. A direct answer to the question
-2. 3-5 key insights specific to sales data (sales trends, product performance, customer behavior)
-3. Sales metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for sales data
-
-Keep your analysis focused on sales aspects such as: revenue, units sold, customer segments,
-product categories, sales channels, seasonality, geographic distribution, and sales funnel metrics.
-"""
-        )
-        chains[DOMAIN_SALES] = LLMChain(llm=self.llm, prompt=sales_prompt)
-        
-        # Healthcare domain chain
-        healthcare_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are a healthcare data analyst expert. You analyze healthcare datasets to extract valuable insights.
-
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
-
-Question or Analysis Request: {question}
+# Analysis prompt instructions for the specialized domains, filled in from
+# DOMAIN_PROMPT_SPECS. Prompts put these fixed instructions first and the dataset and
+# question last (DATASET_PROMPT_SECTION), so calls in the same domain share a
+# byte-identical prefix that the API's prompt cache can reuse.
+DOMAIN_PROMPT_TEMPLATE = """
+You are {analyst} data analyst expert. You analyze {datasets} datasets to extract valuable insights.
 
 Provide a detailed analysis with the following:
 1. A direct answer to the question
-2. 3-5 key insights specific to healthcare data (patient outcomes, treatment effectiveness, health patterns)
-3. Healthcare metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for healthcare data
+2. 3-5 key insights specific to {subject} data ({insights})
+3. {metrics} metrics that would be important to calculate
+4. 2-3 visualization suggestions specifically suited for {visualized} data
 
-Keep your analysis focused on healthcare aspects such as: patient demographics, diagnosis codes,
-treatment efficacy, readmission rates, length of stay, healthcare costs, clinical outcomes, and public health indicators.
+Keep your analysis focused on {aspects} aspects such as: {focus}.
 """
-        )
-        chains[DOMAIN_HEALTHCARE] = LLMChain(llm=self.llm, prompt=healthcare_prompt)
-        
-        # Education domain chain
-        education_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are an education data analyst expert. You analyze educational datasets to extract valuable insights.
 
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
-
-Question or Analysis Request: {question}
+DOMAIN_PROMPT_SPECS = {
+    DOMAIN_FINANCE: {
+        "analyst": "a financial", "datasets": "financial", "subject": "financial",
+        "insights": "trends, outliers, correlations", "metrics": "Financial",
+        "visualized": "financial", "aspects": "financial",
+        "focus": "revenue, expenses, profit margins, ROI, cash flow, investments, stocks, "
+                 "assets, liabilities, and financial ratios",
+    },
+    DOMAIN_FOOD: {
+        "analyst": "a nutrition", "datasets": "food and nutrition", "subject": "nutrition",
+        "insights": "nutritional patterns, health implications", "metrics": "Nutritional",
+        "visualized": "food and nutrition", "aspects": "nutritional",
+        "focus": "calories, macronutrients (protein, carbs, fat), micronutrients (vitamins, "
+                 "minerals), food groups, dietary patterns, and health correlations",
+    },
+    DOMAIN_SALES: {
+        "analyst": "a sales", "datasets": "sales", "subject": "sales",
+        "insights": "sales trends, product performance, customer behavior", "metrics": "Sales",
+        "visualized": "sales", "aspects": "sales",
+        "focus": "revenue, units sold, customer segments, product categories, sales channels, "
+                 "seasonality, geographic distribution, and sales funnel metrics",
+    },
+    DOMAIN_HEALTHCARE: {
+        "analyst": "a healthcare", "datasets": "healthcare", "subject": "healthcare",
+        "insights": "patient outcomes, treatment effectiveness, health patterns",
+        "metrics": "Healthcare", "visualized": "healthcare", "aspects": "healthcare",
+        "focus": "patient demographics, diagnosis codes, treatment efficacy, readmission rates, "
+                 "length of stay, healthcare costs, clinical outcomes, and public health indicators",
+    },
+    DOMAIN_EDUCATION: {
+        "analyst": "an education", "datasets": "educational", "subject": "education",
+        "insights": "student performance, learning patterns, educational outcomes",
+        "metrics": "Education", "visualized": "education", "aspects": "education",
+        "focus": "test scores, attendance, graduation rates, student demographics, course "
+                 "enrollment, teaching methods, educational resources, and learning outcomes",
+    },
+    DOMAIN_HR: {
+        "analyst": "an HR", "datasets": "human resources", "subject": "HR",
+        "insights": "employee patterns, retention factors, performance indicators",
+        "metrics": "HR", "visualized": "HR", "aspects": "HR",
+        "focus": "employee demographics, retention rates, performance reviews, salary "
+                 "distributions, talent acquisition, employee satisfaction, training "
+                 "effectiveness, and workforce planning",
+    },
+    DOMAIN_MARKETING: {
+        "analyst": "a marketing", "datasets": "marketing", "subject": "marketing",
+        "insights": "campaign performance, customer engagement, channel effectiveness",
+        "metrics": "Marketing", "visualized": "marketing", "aspects": "marketing",
+        "focus": "campaign metrics, customer acquisition costs, conversion rates, engagement "
+                 "metrics, customer journey analytics, channel performance, ROI on marketing "
+                 "spend, and audience segmentation",
+    },
+}
+
+# Instructions for each domain's analysis prompt; the generic one (for unsupported
+# domains and error handling) isn't specialized to a field
+DOMAIN_PROMPT_INSTRUCTIONS = {
+    domain: DOMAIN_PROMPT_TEMPLATE.format(**spec) for domain, spec in DOMAIN_PROMPT_SPECS.items()
+}
+DOMAIN_PROMPT_INSTRUCTIONS[DOMAIN_GENERIC] = """
+You are a data analyst expert. You analyze datasets to extract valuable insights.
 
 Provide a detailed analysis with the following:
 1. A direct answer to the question
-2. 3-5 key insights specific to education data (student performance, learning patterns, educational outcomes)
-3. Education metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for education data
+2. 3-5 key insights from the data (patterns, outliers, correlations)
+3. Important metrics that would be useful to calculate
+4. 2-3 visualization suggestions that would best represent this data
 
-Keep your analysis focused on education aspects such as: test scores, attendance, graduation rates,
-student demographics, course enrollment, teaching methods, educational resources, and learning outcomes.
+Base your analysis on the specific column types and data patterns you observe.
 """
-        )
-        chains[DOMAIN_EDUCATION] = LLMChain(llm=self.llm, prompt=education_prompt)
-        
-        # HR domain chain
-        hr_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are an HR data analyst expert. You analyze human resources datasets to extract valuable insights.
 
+DATASET_PROMPT_SECTION = """
 Dataset Summary:
 - Columns: {columns}
 - Sample Data: {data}
 
 Question or Analysis Request: {question}
-
-Provide a detailed analysis with the following:
-1. A direct answer to the question
-2. 3-5 key insights specific to HR data (employee patterns, retention factors, performance indicators)
-3. HR metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for HR data
-
-Keep your analysis focused on HR aspects such as: employee demographics, retention rates, performance reviews,
-salary distributions, talent acquisition, employee satisfaction, training effectiveness, and workforce planning.
 """
-        )
-        chains[DOMAIN_HR] = LLMChain(llm=self.llm, prompt=hr_prompt)
-        
-        # Marketing domain chain
-        marketing_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are a marketing data analyst expert. You analyze marketing datasets to extract valuable insights.
 
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
+# Sample rows shown to the LLM, as CSV (fewer tokens than the aligned to_string() table);
+# very wide frames are cut to their first columns, all column names are listed anyway
+SAMPLE_PROMPT_ROWS = 5
+SAMPLE_PROMPT_MAX_COLUMNS = 20
 
-Question or Analysis Request: {question}
+# Concurrent LLM calls in route_and_analyze_batch (each one mostly waits on the network)
+ROUTER_BATCH_WORKERS = 20
 
-Provide a detailed analysis with the following:
-1. A direct answer to the question
-2. 3-5 key insights specific to marketing data (campaign performance, customer engagement, channel effectiveness)
-3. Marketing metrics that would be important to calculate
-4. 2-3 visualization suggestions specifically suited for marketing data
+# Recent domain analyses keyed by a hash of the model and prompt (domain instructions,
+# columns, sample rows, question), so asking the same question about the same data
+# skips the LLM call
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 256))
+_analysis_cache = LRUCache(maxsize=max(ANALYSIS_CACHE_SIZE, 1))
+_analysis_cache_lock = threading.Lock()
 
-Keep your analysis focused on marketing aspects such as: campaign metrics, customer acquisition costs,
-conversion rates, engagement metrics, customer journey analytics, channel performance, ROI on marketing spend, and audience segmentation.
-"""
-        )
-        chains[DOMAIN_MARKETING] = LLMChain(llm=self.llm, prompt=marketing_prompt)
-        
-        # Generic domain chain (for error handling only)
-        generic_prompt = PromptTemplate(
-            input_variables=["data", "columns", "question"],
-            template="""
-You are a data analyst expert. You analyze datasets to extract valuable insights.
 
-Dataset Summary:
-- Columns: {columns}
-- Sample Data: {data}
+def _to_dataframe(data: Union[str, List[Dict[str, Any]], 'pd.DataFrame']) -> 'pd.DataFrame':
+    """Convert a CSV or JSON-list string, or a list of row dicts, to a DataFrame"""
+    # Import pandas inside the function
+    import pandas as pd
+    from .csv_reader import read_csv_text
+    
+    if isinstance(data, pd.DataFrame):
+        return data
+    if isinstance(data, list) and len(data) > 0:
+        return pd.DataFrame(data)
+    if isinstance(data, str):
+        # JSON payloads start with a bracket; anything else is CSV text
+        if data.lstrip()[:1] in ('[', '{'):
+            try:
+                parsed_data = orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # A CSV whose first header happens to start with a bracket
+                pass
+            else:
+                if isinstance(parsed_data, list):
+                    return pd.DataFrame(parsed_data)
+                raise ValueError("Data string is not in CSV or JSON list format")
+        try:
+            return read_csv_text(data)
+        except Exception:
+            raise ValueError("Failed to parse data string as CSV or JSON")
+    raise ValueError("Data must be a DataFrame, list of dictionaries, or CSV string")
 
-Question or Analysis Request: {question}
+def _sample_csv(df: 'pd.DataFrame', rows: int) -> str:
+    """The first rows of a frame (at most SAMPLE_PROMPT_MAX_COLUMNS columns) as CSV text"""
+    return df.iloc[:rows, :SAMPLE_PROMPT_MAX_COLUMNS].to_csv(index=False)
 
-Provide a detailed analysis with the following:
-1. A direct answer to the question
-2. 3-5 key insights from the data (patterns, outliers, correlations)
-3. Important metrics that would be useful to calculate
-4. 2-3 visualization suggestions that would best represent this data
 
-Base your analysis on the specific column types and data patterns you observe.
-"""
+class DomainRouter:
+    """
+    A router that directs data to domain-specific analysis agents.
+    """
+    
+    def __init__(self, model_name: str = "gpt-4o", temperature: float = 0):
+        """Initialize the domain router with its LLM."""
+        # Initialize the LLM
+        self.llm = ChatOpenAI(
+            model_name=model_name,
+            temperature=temperature,
+            api_key=os.environ.get("OPENAI_API_KEY")
         )
-        chains[DOMAIN_GENERIC] = LLMChain(llm=self.llm, prompt=generic_prompt)
-        
-        return chains
     
     def route_and_analyze(self, domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame'], 
                          question: str = "What are the key insights from this data?") -> Dict[str, Any]:
@@ -269,58 +222,18 @@ Base your analysis on the specific column types and data patterns you observe.
         Returns:
             Dictionary containing analysis results
         """
-        # Import pandas inside the function
-        import pandas as pd
-        
-        # Normalize domain name
-        normalized_domain = domain.strip().title()
-        
-        # Convert data to proper format for analysis
-        if isinstance(data, pd.DataFrame):
-            df = data
-        elif isinstance(data, list) and len(data) > 0:
-            df = pd.DataFrame(data)
-        elif isinstance(data, str):
-            try:
-                df = pd.read_csv(data)
-            except:
-                # Try to parse as JSON if CSV parsing fails
-                try:
-                    parsed_data = json.loads(data)
-                    if isinstance(parsed_data, list):
-                        df = pd.DataFrame(parsed_data)
-                    else:
-                        raise ValueError("Data string is not in CSV or JSON list format")
-                except:
-                    raise ValueError("Failed to parse data string as CSV or JSON")
-        else:
-            raise ValueError("Data must be a DataFrame, list of dictionaries, or CSV string")
-        
-        # Get columns and sample data
-        columns = list(df.columns)
-        sample_data = df.head(5).to_string()
-        
-        # Select the appropriate chain
-        if normalized_domain in self.chains:
-            chain = self.chains[normalized_domain]
-        else:
-            # Fall back to generic if domain not supported
-            chain = self.chains[DOMAIN_GENERIC]
-            normalized_domain = DOMAIN_GENERIC
+        normalized_domain, sample_data, column_list, dataset_info = self._prepare(domain, data)
         
         # Run the chain
         try:
-            result = chain.run(data=sample_data, columns=", ".join(columns), question=question)
+            result = self._analyze(normalized_domain, data=sample_data, columns=column_list, question=question)
             
             # Parse results into a structured format
             analysis_result = {
                 "domain": normalized_domain,
                 "analysis": result,
                 "question": question,
-                "processed_sample_size": len(df) if len(df) <= 5 else 5,
-                "total_rows": len(df),
-                "column_count": len(columns),
-                "columns": columns
+                **dataset_info
             }
             
             return analysis_result
@@ -328,17 +241,13 @@ Base your analysis on the specific column types and data patterns you observe.
             # Fallback to generic if domain-specific analysis fails
             if normalized_domain != DOMAIN_GENERIC:
                 try:
-                    chain = self.chains[DOMAIN_GENERIC]
-                    result = chain.run(data=sample_data, columns=", ".join(columns), question=question)
+                    result = self._analyze(DOMAIN_GENERIC, data=sample_data, columns=column_list, question=question)
                     
                     return {
                         "domain": DOMAIN_GENERIC,
                         "analysis": result,
                         "question": question,
-                        "processed_sample_size": len(df) if len(df) <= 5 else 5,
-                        "total_rows": len(df),
-                        "column_count": len(columns),
-                        "columns": columns,
+                        **dataset_info,
                         "error_reason": str(e)
                     }
                 except Exception as error_handler:
@@ -352,6 +261,175 @@ Base your analysis on the specific column types and data patterns you observe.
                     "error": "Analysis failed",
                     "details": str(e)
                 }
+    
+    def stream_route_and_analyze(self, domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame'],
+                                 question: str = "What are the key insights from this data?") -> 'AnalysisStream':
+        """
+        Like route_and_analyze, but return the analysis text piece by piece as the model
+        generates it, so callers can show the start of the answer without waiting for all of it.
+        The data is converted here, so invalid data raises before any text is requested.
+        
+        Args:
+            domain: The detected domain for the data
+            data: The dataset as CSV string, list of dictionaries, or pandas DataFrame
+            question: The analysis question or request
+            
+        Returns:
+            An iterator over consecutive fragments of the analysis text; its domain
+            attribute is the domain that produced them
+        """
+        normalized_domain, sample_data, column_list, _ = self._prepare(domain, data)
+        return AnalysisStream(self, normalized_domain, sample_data, column_list, question)
+    
+    def _prepare(self, domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame']) -> Tuple[str, str, str, Dict[str, Any]]:
+        """
+        Normalize the domain and build the prompt fields for a dataset.
+        
+        Returns:
+            (domain, sample CSV, joined column names, dataset details reported with the result)
+        """
+        # Normalize domain name, falling back to the generic chain if it isn't supported
+        normalized_domain = domain.strip().title()
+        if normalized_domain not in DOMAIN_PROMPT_INSTRUCTIONS:
+            normalized_domain = DOMAIN_GENERIC
+        
+        # Convert data to proper format for analysis
+        df = _to_dataframe(data)
+        
+        # Get columns and sample data, and the dataset details reported with the result
+        # (each computed once and shared by the domain and generic attempts)
+        columns = df.columns.tolist()
+        row_count = len(df)
+        dataset_info = {
+            "processed_sample_size": min(row_count, SAMPLE_PROMPT_ROWS),
+            "total_rows": row_count,
+            "column_count": len(columns),
+            "columns": columns
+        }
+        return normalized_domain, _sample_csv(df, SAMPLE_PROMPT_ROWS), ", ".join(map(str, columns)), dataset_info
+    
+    def _prompt(self, domain: str, data: str, columns: str, question: str) -> str:
+        """
+        The domain's fixed instructions followed by the filled-in dataset section, sent
+        straight to the chat model (no per-call template or chain)
+        """
+        return DOMAIN_PROMPT_INSTRUCTIONS[domain] + DATASET_PROMPT_SECTION.format(
+            columns=columns, data=data, question=question)
+    
+    def _cache_key(self, prompt: str) -> str:
+        return hashlib.blake2b(f"{self.llm.model_name}\x00{prompt}".encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _analyze(self, domain: str, data: str, columns: str, question: str) -> str:
+        """
+        Ask the LLM for a domain's analysis, reusing the answer from a recent call with the
+        same prompt.
+        """
+        prompt = self._prompt(domain, data, columns, question)
+        if ANALYSIS_CACHE_SIZE <= 0:
+            return self.llm.invoke(prompt).content
+        
+        cache_key = self._cache_key(prompt)
+        with _analysis_cache_lock:
+            cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self.llm.invoke(prompt).content
+        with _analysis_cache_lock:
+            _analysis_cache[cache_key] = result
+        return result
+    
+    def _stream_analysis(self, domain: str, data: str, columns: str, question: str) -> Iterator[str]:
+        """
+        Streaming counterpart of _analyze: a cached answer is yielded whole, otherwise the
+        model's output is yielded as it arrives and cached once complete.
+        """
+        prompt = self._prompt(domain, data, columns, question)
+        if ANALYSIS_CACHE_SIZE <= 0:
+            for chunk in self.llm.stream(prompt):
+                if chunk.content:
+                    yield chunk.content
+            return
+        
+        cache_key = self._cache_key(prompt)
+        with _analysis_cache_lock:
+            cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        with _analysis_cache_lock:
+            _analysis_cache[cache_key] = "".join(parts)
+    
+    def route_and_analyze_batch(self, items: List[Dict[str, Any]],
+                                max_workers: int = ROUTER_BATCH_WORKERS) -> List[Dict[str, Any]]:
+        """
+        Run route_and_analyze for several requests concurrently.
+        
+        Args:
+            items: route_and_analyze keyword arguments ("domain", "data" and optionally
+                "question") for each request
+            max_workers: Maximum number of analyses waiting on the LLM at once
+            
+        Returns:
+            One analysis result per item, in order; an item whose data can't be used gets
+            an error result instead of failing the batch
+        """
+        if not items:
+            return []
+        
+        def analyze(item: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return self.route_and_analyze(**item)
+            except Exception as e:
+                return {
+                    "error": "Analysis failed",
+                    "details": str(e)
+                }
+        
+        workers = min(len(items), max_workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='route') as executor:
+            return list(executor.map(analyze, items))
+
+
+class AnalysisStream:
+    """
+    The text of a streamed analysis, piece by piece. domain starts as the requested
+    domain and becomes Generic if its prompt fails before any text was produced and
+    the generic prompt answers instead.
+    """
+    
+    def __init__(self, router: DomainRouter, domain: str, data: str, columns: str, question: str):
+        self.domain = domain
+        self._router = router
+        self._prompt_fields = {'data': data, 'columns': columns, 'question': question}
+    
+    def __iter__(self) -> Iterator[str]:
+        produced = False
+        try:
+            for text in self._router._stream_analysis(self.domain, **self._prompt_fields):
+                produced = True
+                yield text
+        except Exception:
+            # Fall back to generic only if nothing has been sent yet
+            if produced or self.domain == DOMAIN_GENERIC:
+                raise
+            self.domain = DOMAIN_GENERIC
+            yield from self._router._stream_analysis(DOMAIN_GENERIC, **self._prompt_fields)
+
+def get_router(model_name: str = "gpt-4o", temperature: float = 0) -> DomainRouter:
+    """Return a shared DomainRouter for the model settings, created on first use"""
+    # Normalize the arguments so keyword and positional calls share one router
+    return _get_router(model_name, float(temperature))
+
+@functools.lru_cache(maxsize=4)
+def _get_router(model_name: str, temperature: float) -> DomainRouter:
+    return DomainRouter(model_name=model_name, temperature=temperature)
 
 
 # Create a function to generate domain-specific visualizations
@@ -368,41 +446,31 @@ def generate_domain_visualizations(domain: str, data: Union[str, List[Dict[str,
     """
     import pandas as pd
     
-    # Initialize the router
-    router = DomainRouter(model_name="gpt-4o", temperature=0)
+    # Reuse the shared router
+    router = get_router(model_name="gpt-4o", temperature=0)
     
     # Convert data to proper format
-    if not isinstance(data, pd.DataFrame):
-        if isinstance(data, list) and len(data) > 0:
-            df = pd.DataFrame(data)
-        elif isinstance(data, str):
-            try:
-                df = pd.read_csv(data)
-            except:
-                try:
-                    parsed_data = json.loads(data)
-                    if isinstance(parsed_data, list):
-                        df = pd.DataFrame(parsed_data)
-                    else:
-                        raise ValueError("Data string is not in CSV or JSON list format")
-                except:
-                    raise ValueError("Failed to parse data string as CSV or JSON")
-        else:
-            raise ValueError("Data must be a DataFrame, list of dictionaries, or CSV string")
-    else:
-        df = data
+    df = _to_dataframe(data)
     
-    # Get column types to help with visualization selection
+    # Get column types to help with visualization selection: from the dtypes, with the
+    # remaining columns' unique counts taken in one call
     column_types = {}
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
+    uncounted = []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_numeric_dtype(dtype):
             column_types[col] = "numeric"
-        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
             column_types[col] = "datetime"
-        elif pd.api.types.is_categorical_dtype(df[col]) or df[col].nunique() < 20:
+        elif isinstance(dtype, pd.CategoricalDtype):
             column_types[col] = "categorical"
         else:
-            column_types[col] = "text"
+            column_types[col] = None
+            uncounted.append(col)
+    
+    if uncounted:
+        unique_counts = df[uncounted].nunique()
+        for col in uncounted:
+            column_types[col] = "categorical" if unique_counts[col] < 20 else "text"
     
     # Generate domain-specific visualization suggestions using LLM
     visualization_prompt = PromptTemplate(
@@ -447,14 +515,14 @@ Focus on visualizations that reveal important patterns in {domain} data specific
     try:
         result = vis_chain.run(
             domain=domain,
-            columns=", ".join(df.columns),
-            column_types=json.dumps(column_types),
-            data_sample=df.head(3).to_string()
+            columns=", ".join(map(str, df.columns)),
+            column_types=orjson.dumps(column_types, option=orjson.OPT_NON_STR_KEYS).decode('utf-8'),
+            data_sample=_sample_csv(df, 3)
         )
         
         # Try to parse the result as JSON
         try:
-            parsed_result = json.loads(result)
+            parsed_result = orjson.loads(result)
             if isinstance(parsed_result, list):
                 return parsed_result
             else:
@@ -494,10 +562,33 @@ def analyze_domain_query(domain: str, data: Union[str, List[Dict[str, Any]], 'pd
     # Import pandas inside the function to avoid global import
     import pandas as pd
     
-    router = DomainRouter(model_name="gpt-4o", temperature=0)
+    router = get_router(model_name="gpt-4o", temperature=0)
     return router.route_and_analyze(domain, data, query)
 
 
+def analyze_and_visualize(domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame'],
+                          query: str) -> Dict[str, Any]:
+    """
+    Answer a query and suggest visualizations for the same data, with the two LLM calls
+    running concurrently instead of one after the other.
+    
+    Args:
+        domain: The detected domain for the data
+        data: The dataset as CSV string, list of dictionaries, or pandas DataFrame
+        query: The natural language query to analyze
+        
+    Returns:
+        {"analysis": analyze_domain_query result, "visualizations": generate_domain_visualizations result}
+    """
+    # Parse the data once for both calls
+    df = _to_dataframe(data)
+    
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='route') as executor:
+        analysis = executor.submit(analyze_domain_query, domain, df, query)
+        visualizations = executor.submit(generate_domain_visualizations, domain, df)
+        return {"analysis": analysis.result(), "visualizations": visualizations.result()}
+
+
 # Testing functionality (will not run when imported as a module)
 if __name__ == "__main__":
     # Sample data for testing
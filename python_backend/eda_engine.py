@@ -21,8 +21,9 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # Import the method classes
-from eda_methods import EDAMethods
-from specialized_eda import SpecializedEDAMethods
+from .eda_methods import EDAMethods
+from .specialized_eda import SpecializedEDAMethods
+from .csv_reader import read_csv_text
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +60,8 @@ class IntelligentEDAEngine(EDAMethods, SpecializedEDAMethods):
         self.characteristics = None
         self.eda_type = None
         self.analysis_results = {}
+        # Duplicate row count from the characteristics pass, reused by the quality report
+        self.duplicate_count = None
         
     def analyze_and_execute_eda(self, df: pd.DataFrame, target_column: str = None) -> Dict[str, Any]:
         """Main method: analyze dataset and execute appropriate EDA"""
@@ -135,7 +138,8 @@ class IntelligentEDAEngine(EDAMethods, SpecializedEDAMethods):
         
         # Missing and duplicate analysis
         missing_percentage = (df.isnull().sum().sum() / (rows * columns)) * 100
-        duplicate_percentage = (df.duplicated().sum() / rows) * 100
+        self.duplicate_count = int(df.duplicated().sum())
+        duplicate_percentage = (self.duplicate_count / rows) * 100
         
         # Target variable and imbalance check
         has_target_variable = target_column is not None and target_column in df.columns
@@ -255,7 +259,7 @@ class IntelligentEDAEngine(EDAMethods, SpecializedEDAMethods):
         results = {
             'eda_type': 'basic',
             'summary_statistics': self._basic_summary_stats(df),
-            'data_quality': self._basic_data_quality(df),
+            'data_quality': self._basic_data_quality(df, self.duplicate_count),
             'distributions': self._basic_distributions(df),
             'correlations': self._basic_correlations(df),
             'visualizations': self._basic_visualizations(df),
@@ -420,8 +424,7 @@ def intelligent_eda_analysis(data: Union[str, List[Dict[str, Any]], pd.DataFrame
     """
     # Convert data to DataFrame
     if isinstance(data, str):
-        import io
-        df = pd.read_csv(io.StringIO(data))
+        df = read_csv_text(data)
     elif isinstance(data, list):
         df = pd.DataFrame(data)
     elif isinstance(data, pd.DataFrame):
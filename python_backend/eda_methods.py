@@ -70,10 +70,12 @@ class EDAMethods:
         
         return summary
     
-    def _basic_data_quality(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Basic data quality assessment"""
+    def _basic_data_quality(self, df: pd.DataFrame, duplicate_count: Optional[int] = None) -> Dict[str, Any]:
+        """Basic data quality assessment (duplicate_count skips recounting duplicate rows)"""
         
         total_cells = len(df) * len(df.columns)
+        if duplicate_count is None:
+            duplicate_count = int(df.duplicated().sum())
         missing_cells = df.isnull().sum().sum()
         
         quality = {
@@ -84,8 +86,8 @@ class EDAMethods:
                 'rows_with_missing': int(df.isnull().any(axis=1).sum())
             },
             'duplicates': {
-                'duplicate_rows': int(df.duplicated().sum()),
-                'duplicate_percentage': float((df.duplicated().sum() / len(df)) * 100)
+                'duplicate_rows': duplicate_count,
+                'duplicate_percentage': float((duplicate_count / len(df)) * 100)
             },
             'data_types': df.dtypes.astype(str).to_dict(),
             'memory_usage': {
@@ -1,29 +1,38 @@
 import json
 import logging
 import os
+import re
 import pandas as pd
 from typing import List, Dict, Any, Union
 
-# Import OpenAI for generating example queries
-from openai import OpenAI
+# Import OpenAI for generating example queries (shared client with pooled connections)
+from .openai_client import client
 
 # Import domain detection to provide context
-from domain_detection import detect_data_domain
+from .domain_detection import detect_data_domain
+from .csv_reader import read_csv_text
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Column-name keyword matchers, each compiled once into a single case-insensitive alternation
+TIME_COLUMN_PATTERN = re.compile('date|time|year|month|day', re.IGNORECASE)
+NUTRITION_COLUMN_PATTERN = re.compile('calorie|protein|fat|carb|sugar', re.IGNORECASE)
+FINANCIAL_COLUMN_PATTERN = re.compile('price|revenue|cost|sale|amount', re.IGNORECASE)
+HEALTH_COLUMN_PATTERN = re.compile('age|weight|height|bmi|blood', re.IGNORECASE)
 
-def generate_example_queries(data: Union[str, List[Dict[str, Any]]]) -> List[str]:
+def _matching_columns(columns: List[str], pattern: 're.Pattern[str]') -> List[str]:
+    """Columns whose name contains any of the pattern's keywords"""
+    return [col for col in columns if pattern.search(str(col))]
+
+def generate_example_queries(data: Union[str, List[Dict[str, Any]], pd.DataFrame]) -> List[str]:
     """
     Generate example natural language queries for a dataset
     
     Args:
-        data: Either a CSV string or list of dictionaries representing the data
+        data: A CSV string, list of dictionaries, or DataFrame representing the data
         
     Returns:
         List of example query strings relevant to the dataset
@@ -50,12 +59,15 @@ def generate_example_queries(data: Union[str, List[Dict[str, Any]]]) -> List[str
         # Return generic examples as fallback
         return generate_fallback_examples()
 
-def convert_to_dataframe(data: Union[str, List[Dict[str, Any]]]) -> pd.DataFrame:
+def convert_to_dataframe(data: Union[str, List[Dict[str, Any]], pd.DataFrame]) -> pd.DataFrame:
     """Convert input data to pandas DataFrame"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    
     if isinstance(data, str):
         # Assume it's a CSV string
         try:
-            return pd.read_csv(pd.StringIO(data))
+            return read_csv_text(data)
         except Exception as e:
             logger.error(f"Failed to parse CSV string: {str(e)}")
             raise ValueError(f"Invalid CSV format: {str(e)}")
@@ -194,19 +206,18 @@ def generate_domain_specific_examples(df: pd.DataFrame, domain: str) -> List[str
     """Generate domain-specific example queries based on the dataset structure"""
     examples = []
     
-    # Get column lists by type
+    # Get column lists by type (unique counts only for the non-numeric columns, in one call)
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = [col for col in df.columns if df[col].nunique() < 15 and col not in numeric_cols]
-    time_cols = [col for col in df.columns if any(kw in col.lower() for kw in 
-                                                ['date', 'time', 'year', 'month', 'day'])]
+    unique_counts = df.select_dtypes(exclude=['number']).nunique()
+    categorical_cols = unique_counts.index[unique_counts < 15].tolist()
+    time_cols = _matching_columns(df.columns, TIME_COLUMN_PATTERN)
     
     # Domain-specific examples
     domain = domain.lower()
     
     if domain == 'nutrition' or domain == 'food':
         if numeric_cols:
-            nutrition_cols = [col for col in numeric_cols if any(kw in col.lower() for kw in 
-                                                              ['calorie', 'protein', 'fat', 'carb', 'sugar'])]
+            nutrition_cols = _matching_columns(numeric_cols, NUTRITION_COLUMN_PATTERN)
             cal_col = next((col for col in nutrition_cols if 'calorie' in col.lower()), nutrition_cols[0] if nutrition_cols else numeric_cols[0])
             
             examples.append(f"Which items have the highest {cal_col} content?")
@@ -221,8 +232,7 @@ def generate_domain_specific_examples(df: pd.DataFrame, domain: str) -> List[str
     
     elif domain == 'financial' or domain == 'sales':
         if numeric_cols:
-            financial_cols = [col for col in numeric_cols if any(kw in col.lower() for kw in 
-                                                            ['price', 'revenue', 'cost', 'sale', 'amount'])]
+            financial_cols = _matching_columns(numeric_cols, FINANCIAL_COLUMN_PATTERN)
             value_col = financial_cols[0] if financial_cols else numeric_cols[0]
             
             examples.append(f"What are the total {value_col} values?")
@@ -238,8 +248,7 @@ def generate_domain_specific_examples(df: pd.DataFrame, domain: str) -> List[str
     
     elif domain == 'healthcare':
         if numeric_cols:
-            health_cols = [col for col in numeric_cols if any(kw in col.lower() for kw in 
-                                                           ['age', 'weight', 'height', 'bmi', 'blood'])]
+            health_cols = _matching_columns(numeric_cols, HEALTH_COLUMN_PATTERN)
             value_col = health_cols[0] if health_cols else numeric_cols[0]
             
             examples.append(f"What's the average {value_col} across all records?")
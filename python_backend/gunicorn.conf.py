@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for the Python backend
+
+Serves the Flask app with gevent workers so that requests waiting on the
+OpenAI/Anthropic APIs are multiplexed instead of blocking a whole worker.
+
+Usage (from the repository root):
+    gunicorn -c python_backend/gunicorn.conf.py
+
+CPU-bound pandas work (e.g. inside process_data) still runs on the worker's
+event loop. If it starts starving other requests, push it to gevent's native
+thread pool (gevent.get_hub().threadpool) - a plain ThreadPoolExecutor is
+monkey-patched into greenlets and will not run in parallel.
+"""
+
+import multiprocessing
+import os
+
+# Tells python_backend/__init__.py to monkey-patch the stdlib before the package
+# imports pandas/openai/langchain (the patching must happen before those imports, so
+# it lives in the package __init__, which runs before any backend module); workers
+# inherit this from the master process.
+os.environ.setdefault('DATALYSIS_GEVENT', '1')
+
+# Run from the repository root so the backend is imported as the python_backend package
+chdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+wsgi_app = 'python_backend.app:app'
+
+bind = f"0.0.0.0:{os.environ.get('PYTHON_PORT', 5001)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gevent'
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# LLM calls can take a while; don't let the arbiter kill busy workers
+timeout = 120
+
+def post_fork(server, worker):
+    """Pin each worker to one CPU (GUNICORN_PIN_WORKERS=1) so its caches stay warm"""
+    if os.environ.get('GUNICORN_PIN_WORKERS') == '1' and hasattr(os, 'sched_setaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[worker.age % len(cpus)]})
@@ -0,0 +1,124 @@
+"""
+Background job queue for the Python backend
+
+Long-running work (LLM-backed query analysis) is submitted here so request handlers
+can return a job id immediately and clients poll for the result. When REDIS_URL is set
+and rq is installed jobs are enqueued on Redis and executed by separate `rq worker`
+processes, which must be started from the repository root so the job functions are
+importable.
+
+Without rq jobs run on an in-process thread pool, and their results can only be polled
+from the same process. That suits single-process callers (and the tests); the API runs
+several gunicorn workers, so it only submits jobs when uses_rq is true and otherwise
+answers in the request.
+"""
+
+import os
+import uuid
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from cachetools import TTLCache
+
+# Redis-backed queue for running jobs outside the web workers
+try:
+    from redis import Redis
+    from rq import Queue
+    from rq.job import Job
+    from rq.exceptions import NoSuchJobError
+    RQ_AVAILABLE = True
+except ImportError:
+    RQ_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get('REDIS_URL')
+# Threads for in-process jobs (mostly waiting on LLM APIs, so more than the CPU count)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 8))
+# Seconds a finished job's result stays available for polling
+JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', 3600))
+# Seconds an rq job may run before it is killed
+JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 300))
+
+# Job statuses (the same strings rq uses)
+STATUS_QUEUED = 'queued'
+STATUS_STARTED = 'started'
+STATUS_FINISHED = 'finished'
+STATUS_FAILED = 'failed'
+
+class JobQueue:
+    """Submit callables as background jobs and look up their status and results"""
+
+    def __init__(self, redis_url: Optional[str] = REDIS_URL, workers: int = JOB_WORKERS):
+        self._queue = None
+
+        if redis_url and RQ_AVAILABLE:
+            self._queue = Queue('datalysis', connection=Redis.from_url(redis_url), default_timeout=JOB_TIMEOUT)
+            logger.info("Background jobs will run on rq workers")
+        else:
+            if redis_url:
+                logger.warning("REDIS_URL is set but rq is not installed; using the in-process queue")
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+            self._futures = TTLCache(maxsize=10_000, ttl=JOB_RESULT_TTL)
+            self._lock = threading.Lock()
+
+    @property
+    def uses_rq(self) -> bool:
+        """Whether jobs are executed by rq workers rather than in-process"""
+        return self._queue is not None
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> str:
+        """Schedule func(*args) and return its job id"""
+        if self._queue is not None:
+            job = self._queue.enqueue(func, *args, result_ttl=JOB_RESULT_TTL, failure_ttl=JOB_RESULT_TTL)
+            return job.id
+
+        job_id = uuid.uuid4().hex
+        future = self._executor.submit(func, *args)
+        with self._lock:
+            self._futures[job_id] = future
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return {'job_id', 'status'} plus 'result' once finished or 'error' if it failed,
+        or None for unknown (or expired) job ids
+        """
+        if self._queue is not None:
+            return self._rq_status(job_id)
+
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is None:
+            return None
+        return self._future_status(job_id, future)
+
+    def _rq_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job stored in Redis"""
+        try:
+            job = Job.fetch(job_id, connection=self._queue.connection)
+        except NoSuchJobError:
+            return None
+
+        status = job.get_status(refresh=False)
+        status = getattr(status, 'value', status)
+        info = {'job_id': job_id, 'status': status}
+        if status == STATUS_FINISHED:
+            info['result'] = job.return_value()
+        elif status == STATUS_FAILED:
+            info['error'] = (job.exc_info or 'Job failed').strip().splitlines()[-1]
+        return info
+
+    @staticmethod
+    def _future_status(job_id: str, future: Future) -> Dict[str, Any]:
+        """Status of an in-process job"""
+        if not future.done():
+            status = STATUS_STARTED if future.running() else STATUS_QUEUED
+            return {'job_id': job_id, 'status': status}
+
+        error = future.exception()
+        if error is not None:
+            return {'job_id': job_id, 'status': STATUS_FAILED, 'error': str(error)}
+        return {'job_id': job_id, 'status': STATUS_FINISHED, 'result': future.result()}
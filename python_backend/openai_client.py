@@ -0,0 +1,35 @@
+"""
+Shared OpenAI client for the Python backend
+
+All direct OpenAI calls go through one client backed by a single pooled httpx
+connection pool, so requests after the first reuse a warm TLS connection instead of
+opening a new one. HTTP/2 (multiplexing concurrent calls over one connection) is used
+when the h2 package is installed.
+"""
+
+import os
+
+import httpx
+from openai import OpenAI
+
+# HTTP/2 support for httpx
+try:
+    import h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Seconds to wait for an OpenAI response
+OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', 60))
+# Connections kept open to the API between calls
+OPENAI_KEEPALIVE_CONNECTIONS = 20
+OPENAI_MAX_CONNECTIONS = 100
+
+http_client = httpx.Client(
+    http2=HTTP2_AVAILABLE,
+    timeout=OPENAI_TIMEOUT,
+    limits=httpx.Limits(max_keepalive_connections=OPENAI_KEEPALIVE_CONNECTIONS,
+                        max_connections=OPENAI_MAX_CONNECTIONS),
+)
+
+client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), http_client=http_client)
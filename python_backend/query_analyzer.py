@@ -4,24 +4,23 @@ import os
 import pandas as pd
 from typing import List, Dict, Any, Union, Optional
 
-# Import OpenAI for natural language query processing
-from openai import OpenAI
+# Import OpenAI for natural language query processing (shared client with pooled connections)
+from .openai_client import client
+
+from .csv_reader import read_csv_text
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
-def analyze_query(query: str, data: Union[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+def analyze_query(query: str, data: Union[str, List[Dict[str, Any]], pd.DataFrame]) -> Dict[str, Any]:
     """
     Analyze a natural language query against the dataset and generate results
     
     Args:
         query: The natural language query string
-        data: Either a CSV string or list of dictionaries representing the data
+        data: A CSV string, list of dictionaries, or DataFrame representing the data
         
     Returns:
         Dictionary containing query results including answer, SQL query, and visualization
@@ -43,12 +42,15 @@ def analyze_query(query: str, data: Union[str, List[Dict[str, Any]]]) -> Dict[st
             "visualization": None
         }
 
-def convert_to_dataframe(data: Union[str, List[Dict[str, Any]]]) -> pd.DataFrame:
+def convert_to_dataframe(data: Union[str, List[Dict[str, Any]], pd.DataFrame]) -> pd.DataFrame:
     """Convert input data to pandas DataFrame"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    
     if isinstance(data, str):
         # Assume it's a CSV string
         try:
-            return pd.read_csv(pd.StringIO(data))
+            return read_csv_text(data)
         except Exception as e:
             logger.error(f"Failed to parse CSV string: {str(e)}")
             raise ValueError(f"Invalid CSV format: {str(e)}")
@@ -68,34 +70,38 @@ def generate_ai_query_response(query: str, df: pd.DataFrame) -> Dict[str, Any]:
         # Prepare data sample for OpenAI
         data_sample = df.head(50).to_csv(index=False)
         
-        # Extract column information for more context
+        # Extract column information for more context (each statistic computed once)
         column_info = {}
         for col in df.columns:
-            if pd.api.types.is_numeric_dtype(df[col]):
+            col_data = df[col]
+            if pd.api.types.is_numeric_dtype(col_data):
+                col_min, col_max, col_mean = col_data.min(), col_data.max(), col_data.mean()
                 column_info[col] = {
                     "type": "numeric",
-                    "min": float(df[col].min()) if not pd.isna(df[col].min()) else None,
-                    "max": float(df[col].max()) if not pd.isna(df[col].max()) else None,
-                    "mean": float(df[col].mean()) if not pd.isna(df[col].mean()) else None
+                    "min": float(col_min) if not pd.isna(col_min) else None,
+                    "max": float(col_max) if not pd.isna(col_max) else None,
+                    "mean": float(col_mean) if not pd.isna(col_mean) else None
                 }
-            elif pd.api.types.is_string_dtype(df[col]):
-                unique_values = df[col].nunique()
+            elif pd.api.types.is_string_dtype(col_data):
+                distinct_values = col_data.dropna().unique()
+                unique_values = len(distinct_values)
                 if unique_values < 15:  # Categorical
                     column_info[col] = {
                         "type": "categorical",
                         "unique_values": unique_values,
-                        "examples": df[col].dropna().unique()[:5].tolist()
+                        "examples": distinct_values[:5].tolist()
                     }
                 else:
                     column_info[col] = {
                         "type": "text",
                         "unique_values": unique_values
                     }
-            elif pd.api.types.is_datetime64_dtype(df[col]):
+            elif pd.api.types.is_datetime64_dtype(col_data):
+                col_min, col_max = col_data.min(), col_data.max()
                 column_info[col] = {
                     "type": "datetime",
-                    "min": df[col].min().isoformat() if not pd.isna(df[col].min()) else None,
-                    "max": df[col].max().isoformat() if not pd.isna(df[col].max()) else None
+                    "min": col_min.isoformat() if not pd.isna(col_min) else None,
+                    "max": col_max.isoformat() if not pd.isna(col_max) else None
                 }
             else:
                 column_info[col] = {"type": "other"}
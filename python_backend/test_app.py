@@ -0,0 +1,356 @@
+"""
+Tests for the Flask API's request parsing helpers and endpoints
+
+Run from the repository root: python -m pytest python_backend/test_app.py
+"""
+
+import gc
+import io
+
+import orjson
+import pandas as pd
+import pytest
+from cachetools import LRUCache
+from flask import request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from . import app as app_module
+from . import domain_router
+from .app import _cache_key, _frame_fingerprint, _json_with_rows, _rows_to_frame
+
+
+def test_rows_to_frame_keeps_keys_missing_from_first_row():
+    df = _rows_to_frame([{'a': 1}, {'a': 2, 'b': 3}])
+    
+    assert list(df.columns) == ['a', 'b']
+    assert pd.isna(df.loc[0, 'b'])
+    assert df.loc[1, 'b'] == 3
+
+
+def test_rows_to_frame_matches_pandas_for_uniform_rows():
+    rows = [{'a': 1, 'b': 'x'}, {'b': 'y', 'a': 2}]
+    
+    df = _rows_to_frame(rows)
+    
+    assert list(df.columns) == ['a', 'b']
+    assert df['a'].tolist() == [1, 2]
+    assert df['b'].tolist() == ['x', 'y']
+
+
+def test_rows_to_frame_passes_through_non_row_input():
+    assert _rows_to_frame([]) == []
+    assert _rows_to_frame('a,b\n1,2\n') == 'a,b\n1,2\n'
+
+
+def _parse_streamed(payload, monkeypatch, chunk_rows=2):
+    """Parse a JSON body through the incremental (ijson) path"""
+    monkeypatch.setattr(app_module, 'STREAMING_THRESHOLD_BYTES', 0)
+    monkeypatch.setattr(app_module, 'STREAMING_CHUNK_ROWS', chunk_rows)
+    with app_module.app.test_request_context('/analyze-query', method='POST', data=orjson.dumps(payload),
+                                             content_type='application/json'):
+        return _json_with_rows('data')
+
+
+def test_streamed_body_rows_become_one_frame(monkeypatch):
+    rows = [{'region': f'r{i}', 'revenue': i * 1.5} for i in range(5)]
+    
+    payload = _parse_streamed({'query': 'total?', 'data': rows, 'domain': 'Sales'}, monkeypatch)
+    
+    assert payload['query'] == 'total?'
+    assert payload['domain'] == 'Sales'
+    pd.testing.assert_frame_equal(payload['data'], pd.DataFrame(rows))
+
+
+def test_streamed_body_keeps_nested_fields_and_rows(monkeypatch):
+    rows = [{'id': 1, 'tags': ['a', 'b']}, {'id': 2, 'tags': []}]
+    
+    payload = _parse_streamed({'data': rows, 'options': {'limit': 3, 'fields': ['id']}}, monkeypatch)
+    
+    assert payload['options'] == {'limit': 3, 'fields': ['id']}
+    assert payload['data']['tags'].tolist() == [['a', 'b'], []]
+
+
+def test_streamed_body_with_empty_rows(monkeypatch):
+    payload = _parse_streamed({'data': [], 'query': 'q'}, monkeypatch)
+    
+    assert payload == {'data': [], 'query': 'q'}
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _FakeLLM:
+    """Stands in for the router's chat model"""
+    model_name = 'test-model'
+    
+    def __init__(self, pieces=('Revenue ', 'is ', 'up.')):
+        self.pieces = pieces
+        self.prompts = []
+    
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return _Message(''.join(self.pieces))
+    
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        for piece in self.pieces:
+            yield _Message(piece)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module._router, 'llm', _FakeLLM())
+    monkeypatch.setattr(domain_router, 'ANALYSIS_CACHE_SIZE', 0)
+    return app_module.app.test_client()
+
+
+def test_analyze_query_answers_in_request_without_rq(client):
+    assert not app_module._jobs.uses_rq
+    
+    response = client.post('/analyze-query', json={
+        'data': [{'region': 'West', 'revenue': 10}],
+        'query': 'How is revenue?',
+        'domain': 'Sales'
+    })
+    
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['domain'] == 'Sales'
+    assert body['analysis'] == 'Revenue is up.'
+    assert body['columns'] == ['region', 'revenue']
+
+
+def test_store_dataset_answers_507_when_it_does_not_fit(client, monkeypatch):
+    monkeypatch.setattr(app_module._datasets, 'max_bytes', 16)
+    
+    response = client.post('/datasets', json={'data': [{'a': 1}, {'a': 2}]})
+    
+    assert response.status_code == 507
+    assert response.get_json()['message'] == 'Insufficient storage for dataset'
+
+
+def _chunked(body):
+    # No Content-Length, so the limit is only hit while the body is read (servers that
+    # de-chunk the body set wsgi.input_terminated)
+    return {'input_stream': io.BytesIO(body), 'headers': {'Transfer-Encoding': 'chunked'},
+            'environ_overrides': {'wsgi.input_terminated': True}}
+
+
+def test_chunked_body_over_the_limit_is_413(client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    
+    response = client.post('/detect-domain', content_type='application/json',
+                           **_chunked(b'{"columns": ["' + b'a' * 4096 + b'"]}'))
+    
+    assert response.status_code == 413
+    assert response.get_json()['error'] == 'Request body too large'
+
+
+def test_chunked_csv_body_over_the_limit_is_rejected():
+    with app_module.app.test_request_context('/process-data', method='POST', content_type='text/csv',
+                                             **_chunked(b'a,b\n' + b'1,2\n' * 1024)):
+        request.max_content_length = 1024
+        with pytest.raises(RequestEntityTooLarge):
+            _json_with_rows('data')
+
+
+def test_chunked_body_under_the_limit_is_read_whole(client):
+    body = b'a,b\n' + b'1,2\n' * 10
+    
+    response = client.post('/process-data', content_type='text/csv', **_chunked(body))
+    
+    assert response.status_code == 200
+    assert response.get_json()['original_shape'] == {'rows': 10, 'columns': 2}
+
+
+def test_frame_fingerprint_depends_on_values_columns_and_dtypes():
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+    
+    assert _frame_fingerprint(df) == _frame_fingerprint(df.copy())
+    assert _frame_fingerprint(df) != _frame_fingerprint(df.assign(a=[1, 3]))
+    assert _frame_fingerprint(df) != _frame_fingerprint(df.rename(columns={'b': 'c'}))
+    assert _frame_fingerprint(df) != _frame_fingerprint(df.astype({'a': 'float64'}))
+
+
+def test_frame_fingerprint_handles_unhashable_cells():
+    df = pd.DataFrame({'tags': [['a'], ['b']]})
+    
+    assert _frame_fingerprint(df) == _frame_fingerprint(pd.DataFrame({'tags': [['a'], ['b']]}))
+    assert _frame_fingerprint(df) != _frame_fingerprint(pd.DataFrame({'tags': [['a'], ['c']]}))
+
+
+def test_cache_key_treats_equal_frames_and_rows_consistently():
+    df = pd.DataFrame({'a': [1, 2]})
+    
+    assert _cache_key('endpoint', df) == _cache_key('endpoint', df.copy())
+    assert _cache_key('endpoint', df) != _cache_key('other', df)
+    assert _cache_key('endpoint', [{'a': 1}]) == _cache_key('endpoint', [{'a': 1}])
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    cache = LRUCache(maxsize=16)
+    monkeypatch.setattr(app_module, '_response_cache', cache)
+    monkeypatch.setattr(app_module, 'RESPONSE_CACHE_SIZE', 16)
+    return cache
+
+
+def test_example_queries_are_served_from_cache(response_cache, monkeypatch):
+    calls = []
+    
+    def generate(df):
+        calls.append(df)
+        return ['What is the total revenue?']
+    
+    monkeypatch.setattr(app_module, 'generate_example_queries', generate)
+    client = app_module.app.test_client()
+    body = {'data': [{'revenue': 10}, {'revenue': 20}]}
+    
+    first = client.post('/example-queries', json=body)
+    second = client.post('/example-queries', json=body)
+    changed = client.post('/example-queries', json={'data': [{'revenue': 10}, {'revenue': 21}]})
+    
+    assert [r.headers['X-Cache'] for r in (first, second, changed)] == ['MISS', 'HIT', 'MISS']
+    assert second.get_json()['queries'] == ['What is the total revenue?']
+    assert len(calls) == 2
+
+
+def test_error_results_are_not_cached(response_cache, monkeypatch):
+    monkeypatch.setattr(app_module, 'generate_example_queries', lambda df: ['Error: API unavailable'])
+    client = app_module.app.test_client()
+    body = {'data': [{'revenue': 10}]}
+    
+    client.post('/example-queries', json=body)
+    
+    assert client.post('/example-queries', json=body).headers['X-Cache'] == 'MISS'
+    assert len(response_cache) == 0
+
+
+def _events(response):
+    """(event, data) pairs of a server-sent events body"""
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], orjson.loads(fields['data'])))
+    return events
+
+
+def _stream(client, domain='Sales'):
+    return client.post('/analyze-query?stream=1', json={
+        'data': [{'region': 'West', 'revenue': 10}],
+        'query': 'How is revenue?',
+        'domain': domain
+    })
+
+
+def test_stream_sends_tokens_then_done(client):
+    response = _stream(client)
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert _events(response) == [('token', 'Revenue '), ('token', 'is '), ('token', 'up.'),
+                                 ('done', {'domain': 'Sales'})]
+
+
+def test_stream_falls_back_to_generic_before_any_text(client, monkeypatch):
+    llm = _FakeLLM(pieces=('Generic answer',))
+    stream = llm.stream
+    
+    def fail_first(prompt):
+        if not llm.prompts:
+            llm.prompts.append(prompt)
+            raise RuntimeError('domain prompt failed')
+        return stream(prompt)
+    
+    monkeypatch.setattr(llm, 'stream', fail_first)
+    monkeypatch.setattr(app_module._router, 'llm', llm)
+    
+    assert _events(_stream(client)) == [('token', 'Generic answer'), ('done', {'domain': 'Generic'})]
+    assert llm.prompts[1].startswith(domain_router.DOMAIN_PROMPT_INSTRUCTIONS[domain_router.DOMAIN_GENERIC])
+
+
+def test_stream_reports_error_after_partial_text(client, monkeypatch):
+    def stream(prompt):
+        yield _Message('Revenue ')
+        raise RuntimeError('connection reset')
+    
+    llm = _FakeLLM()
+    monkeypatch.setattr(llm, 'stream', stream)
+    monkeypatch.setattr(app_module._router, 'llm', llm)
+    
+    assert _events(_stream(client)) == [
+        ('token', 'Revenue '),
+        ('error', {'error': 'Analysis failed', 'details': 'connection reset'})
+    ]
+
+
+def test_stream_rejects_invalid_data_before_responding(client):
+    response = client.post('/analyze-query?stream=1', json={
+        'data': 42,
+        'query': 'How is revenue?',
+        'domain': 'Sales'
+    })
+    
+    assert response.status_code == 500
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['message'] == 'Failed to analyze query'
+
+
+def test_stream_is_ignored_for_generic_domain(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'analyze_query', lambda query, dataset: {'answer': 'general'})
+    
+    response = _stream(client, domain='Generic')
+    
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'answer': 'general'}
+
+
+def test_streamed_answer_is_cached_for_later_requests(monkeypatch):
+    llm = _FakeLLM()
+    router = domain_router.DomainRouter.__new__(domain_router.DomainRouter)
+    router.llm = llm
+    monkeypatch.setattr(domain_router, '_analysis_cache', LRUCache(maxsize=4))
+    rows = [{'region': 'West', 'revenue': 10}]
+    
+    streamed = list(router.stream_route_and_analyze('Sales', rows, 'How is revenue?'))
+    cached = list(router.stream_route_and_analyze('Sales', rows, 'How is revenue?'))
+    
+    assert streamed == ['Revenue ', 'is ', 'up.']
+    assert cached == ['Revenue is up.']
+    assert router.route_and_analyze('Sales', rows, 'How is revenue?')['analysis'] == 'Revenue is up.'
+    assert len(llm.prompts) == 1
+
+
+def test_excel_body_is_read_into_a_frame():
+    df = pd.DataFrame({'region': ['West', 'East'], 'revenue': [10, 20]})
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine='openpyxl')
+    
+    with app_module.app.test_request_context(
+            '/process-data?preprocessingRules=trim_strings', method='POST', data=buffer.getvalue(),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'):
+        payload = _json_with_rows('data')
+    
+    assert payload['preprocessingRules'] == 'trim_strings'
+    pd.testing.assert_frame_equal(payload['data'], df, check_dtype=False)
+
+
+def test_garbage_collector_runs_during_llm_calls(client, monkeypatch):
+    enabled = []
+    llm = _FakeLLM()
+    invoke = llm.invoke
+    
+    def record(prompt):
+        enabled.append(gc.isenabled())
+        return invoke(prompt)
+    
+    monkeypatch.setattr(llm, 'invoke', record)
+    monkeypatch.setattr(app_module._router, 'llm', llm)
+    
+    client.post('/analyze-query', json={'data': [{'a': 1}], 'query': 'q', 'domain': 'Sales'})
+    
+    assert enabled == [True]
+    assert gc.isenabled()
+    assert app_module._no_gc_depth == 0
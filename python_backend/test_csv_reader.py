@@ -0,0 +1,35 @@
+"""
+Parity tests for the Arrow-backed CSV reader against pandas.read_csv
+
+Run from the repository root: python -m pytest python_backend/test_csv_reader.py
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from .csv_reader import read_csv_bytes, read_csv_text
+
+
+@pytest.mark.parametrize('text', [
+    # ISO timestamps (with and without a zone) and dates stay text
+    'when,x\n2024-01-02T03:04:05,1\n2024-01-03 00:00:00,2\n',
+    'when\n2024-01-02T03:04:05Z\n2024-01-03T00:00:00+02:00\n',
+    'day\n2024-01-02\n2024-01-03\n',
+    # Empty header cells are named "Unnamed: <position>"
+    ',a\n1,2\n',
+    'a,,b\n1,2,3\n',
+    'Unnamed: 1,\n1,2\n',
+    # Integers wider than int64 are kept exact
+    'n\n123456789012345678901234567890\n5\n',
+    'n\n18446744073709551615\n1\n',
+    # Ordinary files
+    'id,price,label\n1,1.5,a\n2,,b\n3,2.25,\n',
+    'a,a\n1,2\n',
+])
+def test_matches_pandas(text):
+    expected = pd.read_csv(io.StringIO(text))
+    
+    pd.testing.assert_frame_equal(read_csv_text(text), expected)
+    pd.testing.assert_frame_equal(read_csv_bytes(text.encode('utf-8')), expected)
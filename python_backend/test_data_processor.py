@@ -0,0 +1,155 @@
+"""
+Tests for the data processor: compiled column statistics and outlier kernels, input parsing,
+chart data
+
+Run from the repository root: python -m pytest python_backend/test_data_processor.py
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .data_processor import (
+    NUMERIC_STATISTICS,
+    apply_expression_rules,
+    count_outliers,
+    numeric_column_moments,
+    numeric_statistics,
+    parse_preprocessing_rules,
+    prepare_category_data,
+    prepare_pie_data,
+    process_data,
+    read_excel_file,
+)
+
+
+def _values():
+    rng = np.random.default_rng(1)
+    values = np.column_stack([
+        rng.normal(100, 15, 500),
+        rng.integers(-1000, 1000, 500).astype(np.float64),
+        rng.exponential(2.0, 500),
+    ])
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return values
+
+
+def test_numeric_statistics_match_describe():
+    values = _values()
+    
+    statistics = numeric_statistics(values)
+    
+    expected = pd.DataFrame(values).describe()
+    for name in NUMERIC_STATISTICS:
+        np.testing.assert_allclose(statistics[name], expected.loc[name].to_numpy(), rtol=1e-9)
+
+
+def test_moments_of_sparse_columns():
+    values = np.array([[np.nan, 4.0, np.nan],
+                       [np.nan, np.nan, np.nan],
+                       [np.nan, np.nan, 2.0],
+                       [np.nan, np.nan, 6.0]])
+    
+    count, mean, std, low, high = numeric_column_moments(np.asfortranarray(values))
+    
+    assert count.tolist() == [0, 1, 2]
+    assert np.isnan(mean[0]) and np.isnan(low[0]) and np.isnan(high[0])
+    # A single value has a mean but no sample standard deviation
+    assert (mean[1], low[1], high[1]) == (4.0, 4.0, 4.0)
+    assert np.isnan(std[1])
+    assert std[2] == pytest.approx(np.std([2.0, 6.0], ddof=1))
+
+
+def test_numeric_statistics_of_empty_inputs():
+    no_columns = numeric_statistics(np.empty((3, 0)))
+    no_rows = numeric_statistics(np.empty((0, 2)))
+    
+    assert all(no_columns[name].size == 0 for name in NUMERIC_STATISTICS)
+    assert no_rows['count'].tolist() == [0, 0]
+    assert np.isnan(no_rows['50%']).all()
+
+
+def test_count_outliers_matches_masks():
+    values = _values()
+    low = np.nanpercentile(values, 5, axis=0)
+    high = np.nanpercentile(values, 95, axis=0)
+    
+    counts = count_outliers(np.asfortranarray(values), low, high)
+    
+    expected = ((values < low) | (values > high)).sum(axis=0)
+    assert counts.tolist() == expected.tolist()
+
+
+def test_count_outliers_ignores_missing_values_and_bounds_are_inclusive():
+    values = np.array([[np.nan], [1.0], [5.0], [9.0]])
+    
+    assert count_outliers(values, np.array([1.0]), np.array([5.0])).tolist() == [1]
+
+
+def _workbook_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine='openpyxl')
+    return buffer.getvalue()
+
+
+def test_read_excel_file_reads_uploaded_bytes():
+    df = pd.DataFrame({'region': ['West', 'East'], 'revenue': [10, 20]})
+    
+    pd.testing.assert_frame_equal(read_excel_file(_workbook_bytes(df)), df, check_dtype=False)
+
+
+def test_workbook_path_strings_are_not_opened(tmp_path):
+    path = tmp_path / 'secret.xlsx'
+    path.write_bytes(_workbook_bytes(pd.DataFrame({'password': ['hunter2']})))
+    
+    result = process_data(str(path))
+    
+    # The string is parsed as (one-line) CSV text, never read from disk
+    assert 'hunter2' not in json.dumps(result, default=str)
+
+
+def test_expression_rules_need_their_prefix():
+    rules = ("compute: margin = (revenue - cost) / revenue\n"
+             "filter: quantity > 0\n"
+             "margin = 5\n"
+             "target_column: revenue\n")
+    
+    assert parse_preprocessing_rules(rules)['expressions'] == [
+        ('margin', '(revenue - cost) / revenue'),
+        (None, 'quantity > 0'),
+    ]
+
+
+def test_expression_rules_compute_and_filter():
+    df = pd.DataFrame({'revenue': [10.0, 20.0, 30.0], 'cost': [5.0, 5.0, 40.0],
+                       'region': ['West', 'Test', 'East']})
+    
+    result = apply_expression_rules(df, [('margin', '(revenue - cost) / revenue'),
+                                         (None, "region != 'Test'")])
+    
+    assert result['region'].tolist() == ['West', 'East']
+    assert result['margin'].tolist() == pytest.approx([0.5, -1 / 3])
+
+
+@pytest.mark.parametrize('expression', [
+    "region.str.contains('W')",
+    'revenue.__class__',
+    '@pd',
+    'undefined_column > 1',
+])
+def test_unsupported_expression_rules_are_skipped(expression):
+    df = pd.DataFrame({'revenue': [1.0, 2.0], 'region': ['West', 'East']})
+    
+    pd.testing.assert_frame_equal(apply_expression_rules(df, [(None, expression), ('x', expression)]), df)
+
+
+@pytest.mark.parametrize('prepare', [prepare_category_data, prepare_pie_data])
+def test_chart_groups_with_mixed_type_keys_keep_groupby_order(prepare):
+    df = pd.DataFrame({'key': [1, 'a', 2.5, 'b', 'a'], 'value': [1, 2, 3, 4, 5]})
+    expected = df.groupby('key')['value'].sum()
+    
+    assert prepare(df, 'key', 'value') == [
+        {'category': str(key), 'value': float(value)} for key, value in expected.items()]
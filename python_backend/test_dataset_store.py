@@ -0,0 +1,110 @@
+"""
+Tests for the shared-memory dataset store
+
+Run from the repository root: python -m pytest python_backend/test_dataset_store.py
+"""
+
+import pandas as pd
+import pytest
+
+from . import dataset_store
+from .dataset_store import DatasetNotFoundError, DatasetStore, DatasetStoreFullError
+
+
+@pytest.fixture
+def store():
+    store = DatasetStore(ttl_seconds=60)
+    yield store
+    # Unlink everything the test created
+    store.ttl_seconds = 0
+    for dataset_id in list(store._owned):
+        store._owned[dataset_id] = (store._owned[dataset_id][0], 0)
+    store.evict_expired()
+
+
+def _frame(rows=100):
+    return pd.DataFrame({'id': range(rows), 'value': [i * 0.5 for i in range(rows)],
+                         'label': [f'row {i}' for i in range(rows)]})
+
+
+def test_put_and_get_round_trip(store):
+    df = _frame()
+    
+    dataset_id = store.put(df)
+    
+    pd.testing.assert_frame_equal(store.get(dataset_id), df, check_dtype=False)
+
+
+def test_unknown_id_is_not_found(store):
+    with pytest.raises(DatasetNotFoundError):
+        store.get('0' * 32)
+
+
+def test_expired_dataset_is_not_found_and_unlinked(store, monkeypatch):
+    dataset_id = store.put(_frame())
+    now = dataset_store.time.time()
+    monkeypatch.setattr(dataset_store.time, 'time', lambda: now + store.ttl_seconds + 1)
+    
+    with pytest.raises(DatasetNotFoundError):
+        store.get(dataset_id)
+    store.evict_expired()
+    
+    assert dataset_id not in store._owned
+    assert store._owned_bytes == 0
+    with pytest.raises(DatasetNotFoundError):
+        DatasetStore().get(dataset_id)
+
+
+def test_least_recently_used_dataset_is_evicted_for_room(store):
+    first = store.put(_frame())
+    store.max_bytes = store._owned_bytes * 2
+    second = store.put(_frame())
+    
+    # Reading the first dataset makes the second the least recently used
+    store.get(first)
+    third = store.put(_frame())
+    
+    assert list(store._owned) == [first, third]
+    with pytest.raises(DatasetNotFoundError):
+        store.get(second)
+
+
+def test_dataset_larger_than_capacity_is_refused(store):
+    store.max_bytes = 1024
+    
+    with pytest.raises(DatasetStoreFullError):
+        store.put(_frame(10_000))
+    assert store._owned_bytes == 0
+
+
+@pytest.fixture
+def reader(monkeypatch):
+    # A second store in this process stands in for another worker; attaching would
+    # otherwise drop the owner's registration with the resource tracker
+    monkeypatch.setattr(dataset_store.resource_tracker, 'unregister', lambda name, rtype: None)
+    return DatasetStore(ttl_seconds=60)
+
+
+def test_attachment_is_dropped_once_the_owner_evicts_the_dataset(store, reader):
+    first = store.put(_frame())
+    pd.testing.assert_frame_equal(reader.get(first), _frame(), check_dtype=False)
+    
+    store.max_bytes = store._owned_bytes
+    store.put(_frame())
+    reader.evict_expired()
+    
+    assert first not in reader._attached
+    assert reader._attached_bytes == 0
+    with pytest.raises(DatasetNotFoundError):
+        reader.get(first)
+
+
+def test_attachments_stay_within_max_bytes(store, reader):
+    first, second = store.put(_frame()), store.put(_frame())
+    reader.max_bytes = store._owned_bytes // 2
+    
+    reader.get(first)
+    reader.get(second)
+    
+    assert list(reader._attached) == [second]
+    assert reader._attached_bytes == store._owned_bytes // 2
@@ -0,0 +1,65 @@
+"""
+Tests for sharing concurrent domain detections of the same data
+
+Run from the repository root: python -m pytest python_backend/test_domain_detection.py
+"""
+
+import threading
+
+import pytest
+
+from . import domain_detection
+
+COLUMNS = ['region', 'revenue']
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(domain_detection, '_domain_cache', domain_detection.LRUCache(maxsize=8))
+    monkeypatch.setattr(domain_detection, '_domain_pending', {})
+
+
+def _answer(domain_prompt, columns):
+    return {'domain': 'Sales', 'reason': 'revenue by region', 'confidence': 0.9, 'features': []}
+
+
+def _pending_key():
+    domain_prompt = domain_detection._build_domain_prompt(COLUMNS, None)
+    return domain_detection.hashlib.blake2b(domain_prompt.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def test_interrupted_detection_releases_waiters(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    
+    def interrupted(domain_prompt, columns):
+        started.set()
+        release.wait(5)
+        raise KeyboardInterrupt
+    
+    def owner():
+        with pytest.raises(KeyboardInterrupt):
+            domain_detection.detect_data_domain(COLUMNS)
+    
+    monkeypatch.setattr(domain_detection, '_detect_domain', interrupted)
+    thread = threading.Thread(target=owner)
+    thread.start()
+    started.wait(5)
+    pending = domain_detection._domain_pending[_pending_key()]
+    release.set()
+    thread.join(5)
+    
+    # Waiters get an ordinary error and the next request makes a fresh attempt
+    assert isinstance(pending.exception(timeout=0), RuntimeError)
+    assert domain_detection._domain_pending == {}
+    monkeypatch.setattr(domain_detection, '_detect_domain', _answer)
+    assert domain_detection.detect_data_domain(COLUMNS)['domain'] == 'Sales'
+
+
+def test_waiter_gives_up_after_timeout(monkeypatch):
+    monkeypatch.setattr(domain_detection, 'DOMAIN_WAIT_TIMEOUT', 0.01)
+    domain_detection._domain_pending[_pending_key()] = domain_detection.Future()
+    
+    result = domain_detection.detect_data_domain(COLUMNS)
+    
+    assert result['domain'] == 'Error'
+    assert 'timed out' in result['reason']
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 Test script for domain detection and visualization generation
+
+Run from the repository root: python -m python_backend.test_domain_system
 """
 
 import json
@@ -9,9 +11,9 @@ import sys
 from typing import Dict, Any, List
 
 # Import our modules
-from domain_detection import detect_data_domain
-from domain_router import analyze_domain_query, SUPPORTED_DOMAINS
-from visualization_generator import generate_domain_visualizations
+from .domain_detection import detect_data_domain
+from .domain_router import analyze_domain_query, SUPPORTED_DOMAINS
+from .visualization_generator import generate_domain_visualizations
 
 # Sample datasets for testing
 SAMPLE_DATA = {
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 Test script for food domain detection and visualization generation
+
+Run from the repository root: python -m python_backend.test_food_domain
 """
 
 import json
@@ -9,9 +11,9 @@ import sys
 from typing import Dict, Any, List
 
 # Import our modules
-from domain_detection import detect_data_domain
-from domain_router import analyze_domain_query
-from visualization_generator import generate_domain_visualizations
+from .domain_detection import detect_data_domain
+from .domain_router import analyze_domain_query
+from .visualization_generator import generate_domain_visualizations
 
 # Food dataset for testing
 FOOD_DATA = """
@@ -0,0 +1,58 @@
+"""
+Tests for the in-process background job queue
+
+Run from the repository root: python -m pytest python_backend/test_job_queue.py
+"""
+
+import threading
+
+from .job_queue import JobQueue, STATUS_FAILED, STATUS_FINISHED, STATUS_QUEUED, STATUS_STARTED
+
+
+def _wait(queue, job_id, timeout=5):
+    queue._futures[job_id].exception(timeout=timeout)
+    return queue.status(job_id)
+
+
+def test_submit_and_poll_result():
+    queue = JobQueue(redis_url=None, workers=1)
+    
+    job_id = queue.submit(sum, [1, 2, 3])
+    
+    assert not queue.uses_rq
+    assert _wait(queue, job_id) == {'job_id': job_id, 'status': STATUS_FINISHED, 'result': 6}
+
+
+def test_failed_job_reports_error():
+    def fail():
+        raise ValueError('bad data')
+    
+    queue = JobQueue(redis_url=None, workers=1)
+    job_id = queue.submit(fail)
+    
+    assert _wait(queue, job_id) == {'job_id': job_id, 'status': STATUS_FAILED, 'error': 'bad data'}
+
+
+def test_status_while_running_and_queued():
+    release = threading.Event()
+    started = threading.Event()
+    
+    def block():
+        started.set()
+        release.wait(5)
+    
+    queue = JobQueue(redis_url=None, workers=1)
+    running = queue.submit(block)
+    waiting = queue.submit(sum, [])
+    started.wait(5)
+    
+    try:
+        assert queue.status(running)['status'] == STATUS_STARTED
+        assert queue.status(waiting)['status'] == STATUS_QUEUED
+    finally:
+        release.set()
+    assert _wait(queue, waiting)['status'] == STATUS_FINISHED
+
+
+def test_unknown_job_id():
+    assert JobQueue(redis_url=None, workers=1).status('missing') is None
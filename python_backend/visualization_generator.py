@@ -4,7 +4,7 @@ Domain-specific visualization generator for Excel data analysis platform
 This module generates visualization code and suggestions based on data domain and content.
 """
 
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, List, Optional, Union, Tuple, Iterator
 import os
 import json
 import re
@@ -19,7 +19,7 @@ from langchain.chains import LLMChain
 from langchain_community.chat_models import ChatOpenAI
 
 # Import domain constants
-from domain_router import (
+from .domain_router import (
     DOMAIN_FINANCE,
     DOMAIN_FOOD,
     DOMAIN_SALES,
@@ -27,7 +27,8 @@ from domain_router import (
     DOMAIN_EDUCATION,
     DOMAIN_HR,
     DOMAIN_MARKETING,
-    DOMAIN_GENERIC
+    DOMAIN_GENERIC,
+    _to_dataframe
 )
 
 class VisualizationGenerator:
@@ -440,13 +441,12 @@ Return your response in JSON format with this structure:
             "error": True
         }]
 
-    def _enhance_visualizations_with_real_data(self, visualizations, df, domain):
-        """Enhance AI-generated visualizations with real data from the dataset"""
+    def _iter_enhanced_visualizations(self, visualizations, df, domain):
+        """Enhance AI-generated visualizations with real data from the dataset, one at a time"""
         import pandas as pd
         import numpy as np
         import re
         
-        enhanced_vizs = []
         df_columns = df.columns.tolist()
         print(f"Available dataset columns: {df_columns}")
         
@@ -551,15 +551,13 @@ Return your response in JSON format with this structure:
                 viz["domain"] = domain
                 
                 # Add the enhanced visualization
-                enhanced_vizs.append(viz)
+                yield viz
                 
             except Exception as e:
                 print(f"Error enhancing visualization: {e}")
                 # Still include it, but mark the error
                 viz["error"] = str(e)
-                enhanced_vizs.append(viz)
-        
-        return enhanced_vizs
+                yield viz
 
     def generate_visualizations(self, domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame']) -> List[Dict[str, Any]]:
         """
@@ -572,23 +570,26 @@ Return your response in JSON format with this structure:
         Returns:
             List of visualization suggestions with configuration and Plotly code
         """
+        return list(self.iter_visualizations(domain, data))
+
+    def iter_visualizations(self, domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame']) -> Iterator[Dict[str, Any]]:
+        """
+        Generate domain-specific visualization suggestions, yielding each one as soon as
+        it has been checked against the dataset.
+        
+        Args:
+            domain: The detected domain for the data
+            data: The dataset as CSV string, list of dictionaries, or pandas DataFrame
+            
+        Yields:
+            Visualization suggestions with configuration and Plotly code
+        """
         import pandas as pd
         
         print(f"Generating visualizations for domain: {domain}")
         
         # Convert data to DataFrame if not already
-        if isinstance(data, str):
-            # Assuming CSV format
-            import io
-            df = pd.read_csv(io.StringIO(data))
-        elif isinstance(data, list):
-            # List of dictionaries
-            df = pd.DataFrame(data)
-        elif isinstance(data, pd.DataFrame):
-            # Already a DataFrame
-            df = data
-        else:
-            raise ValueError(f"Unsupported data type: {type(data)}")
+        df = _to_dataframe(data)
         
         # Extract column info
         columns = df.columns.tolist()
@@ -676,12 +677,13 @@ Return your response in JSON format with this structure:
             # If no generic chain, return error message
             if chain is None:
                 print(f"No chain found for domain '{normalized_domain}', cannot generate visualizations")
-                return [{
+                yield {
                     "title": "Visualization Error",
                     "description": "Unable to generate visualizations for this domain.",
                     "error": f"No visualization chain found for domain: {normalized_domain}",
                     "chart_type": "error"
-                }]
+                }
+                return
         
         try:
             print(f"Running LLM chain for domain '{normalized_domain}'")
@@ -708,28 +710,28 @@ Return your response in JSON format with this structure:
                 visualizations = json.loads(result)
                 print(f"Successfully parsed JSON response with {len(visualizations)} visualizations")
                 
-                # Post-process to ensure real data is used
-                enhanced_vizs = self._enhance_visualizations_with_real_data(visualizations, df, normalized_domain)
-                return enhanced_vizs
-                
             except (json.JSONDecodeError, AttributeError) as e:
                 print(f"Error parsing visualization JSON: {e}")
                 print(f"Raw result: {result}")
-                return [{
+                yield {
                     "title": "JSON Parsing Error",
                     "description": "Unable to parse visualization results.",
                     "error": f"Error parsing visualization results: {str(e)}",
                     "chart_type": "error"
-                }]
+                }
+                return
+            
+            # Post-process to ensure real data is used
+            yield from self._iter_enhanced_visualizations(visualizations, df, normalized_domain)
                 
         except Exception as e:
             print(f"Error generating visualizations: {e}")
-            return [{
+            yield {
                 "title": "Visualization Generation Error",
                 "description": "An unexpected error occurred while generating visualizations.",
                 "error": f"Error: {str(e)}",
                 "chart_type": "error"
-            }]
+            }
 
 
 # For direct usage without the class
@@ -749,6 +751,21 @@ def generate_domain_visualizations(domain: str, data: Union[str, List[Dict[str,
     return generator.generate_visualizations(domain, data)
 
 
+def iter_domain_visualizations(domain: str, data: Union[str, List[Dict[str, Any]], 'pd.DataFrame']) -> Iterator[Dict[str, Any]]:
+    """
+    Generate domain-specific visualization suggestions one at a time, for streaming responses.
+    
+    Args:
+        domain: The detected domain for the data
+        data: The dataset as CSV string, list of dictionaries, or pandas DataFrame
+        
+    Yields:
+        Visualization suggestions with configuration and Plotly code
+    """
+    generator = VisualizationGenerator()
+    yield from generator.iter_visualizations(domain, data)
+
+
 # Testing functionality (will not run when imported as a module)
 if __name__ == "__main__":
     import re
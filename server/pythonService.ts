@@ -8,9 +8,40 @@ import { Express } from 'express';
 const PYTHON_PORT = process.env.PYTHON_PORT || 5001;
 const PYTHON_URL = `http://localhost:${PYTHON_PORT}`;
 
+// Polling for background jobs (e.g. /analyze-query answers 202 with a job id)
+const JOB_POLL_INTERVAL_MS = 500;
+const JOB_TIMEOUT_MS = 5 * 60 * 1000;
+
 // Flag to track if the Python server is already started
 let pythonServerStarted = false;
 
+/**
+ * Resolve a Python backend response, polling /jobs/<id> when the request was
+ * accepted as a background job (HTTP 202)
+ */
+async function resolvePythonJob(response: { status: number; data: any }): Promise<any> {
+  if (response.status !== 202 || !response.data?.job_id) {
+    return response.data;
+  }
+  
+  const jobId = response.data.job_id;
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  
+  while (Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const job = await axios.get(`${PYTHON_URL}/jobs/${jobId}`);
+    
+    if (job.data.status === 'finished') {
+      return job.data.result;
+    }
+    if (job.data.status === 'failed') {
+      throw new Error(job.data.error || `Job ${jobId} failed`);
+    }
+  }
+  
+  throw new Error(`Timed out waiting for job ${jobId}`);
+}
+
 /**
  * Start the Python backend server
  */
@@ -33,8 +64,8 @@ export async function startPythonBackend(): Promise<void> {
       return;
     }
     
-    // Start Python process
-    const pythonProcess = spawn('python', [pythonScriptPath]);
+    // Start Python process (the backend is a package, so run it with -m from the project root)
+    const pythonProcess = spawn('python', ['-m', 'python_backend'], { cwd: process.cwd() });
     
     pythonProcess.stdout.on('data', (data) => {
       console.log(`[Python] ${data.toString().trim()}`);
@@ -121,7 +152,7 @@ export function registerPythonProxyRoutes(app: Express): void {
   app.post('/api/python/analyze-query', async (req, res) => {
     try {
       const response = await axios.post(`${PYTHON_URL}/analyze-query`, req.body);
-      res.json(response.data);
+      res.json(await resolvePythonJob(response));
     } catch (error: any) {
       console.error('Error calling Python query analysis:', error);
       res.status(500).json({ 
@@ -158,6 +189,34 @@ export function registerPythonProxyRoutes(app: Express): void {
       });
     }
   });
+  
+  // Dataset upload endpoint (returns a dataset_id for later requests)
+  app.post('/api/python/datasets', async (req, res) => {
+    try {
+      const response = await axios.post(`${PYTHON_URL}/datasets`, req.body);
+      res.status(response.status).json(response.data);
+    } catch (error: any) {
+      console.error('Error storing dataset in Python backend:', error);
+      res.status(500).json({ 
+        error: 'Failed to store dataset',
+        details: error.message
+      });
+    }
+  });
+  
+  // Combined domain detection, processing and example queries endpoint
+  app.post('/api/python/analyze-all', async (req, res) => {
+    try {
+      const response = await axios.post(`${PYTHON_URL}/analyze-all`, req.body);
+      res.json(response.data);
+    } catch (error: any) {
+      console.error('Error calling Python combined analysis:', error);
+      res.status(500).json({ 
+        error: 'Failed to analyze data',
+        details: error.message
+      });
+    }
+  });
 }
 
 /**
@@ -213,7 +272,7 @@ export async function analyzeQueryWithPython(query: string, data: any): Promise<
       query, 
       data
     });
-    return response.data;
+    return await resolvePythonJob(response);
   } catch (error: any) {
     console.error('Error calling Python query analysis:', error);
     throw new Error(`Failed to analyze query: ${error.message}`);
@@ -247,4 +306,68 @@ export async function generateDomainVisualizationsWithPython(domain: string, dat
     console.error('Error calling Python domain visualization generation:', error);
     throw new Error(`Failed to generate domain visualizations: ${error.message}`);
   }
+}
+
+/**
+ * Call Python backend for domain detection, data processing and example queries in one request.
+ * Prefer this over calling the three endpoints separately when all results are needed.
+ */
+export async function analyzeAllWithPython(data: any, preprocessingRules?: string): Promise<{
+  domain: any;
+  processed: any;
+  queries: string[];
+}> {
+  try {
+    const response = await axios.post(`${PYTHON_URL}/analyze-all`, { 
+      data,
+      preprocessingRules
+    });
+    return response.data;
+  } catch (error: any) {
+    console.error('Error calling Python combined analysis:', error);
+    throw new Error(`Failed to analyze data: ${error.message}`);
+  }
+}
+
+/**
+ * Send a dataset encoded as an Arrow IPC stream (e.g. from apache-arrow's
+ * tableToIPC(table, 'stream')) to a Python backend endpoint. This skips JSON
+ * encoding of the rows entirely; the remaining fields (query, domain,
+ * preprocessingRules) are passed as query parameters.
+ */
+export async function postArrowToPython(
+  endpoint: '/process-data' | '/analyze-query' | '/analyze-all' | '/example-queries' | '/domain-visualizations',
+  ipcStream: Uint8Array,
+  params: Record<string, string> = {}
+): Promise<any> {
+  try {
+    const response = await axios.post(`${PYTHON_URL}${endpoint}`, ipcStream, {
+      params,
+      headers: { 'Content-Type': 'application/vnd.apache.arrow.stream' },
+      maxBodyLength: Infinity
+    });
+    return await resolvePythonJob(response);
+  } catch (error: any) {
+    console.error(`Error sending Arrow data to Python ${endpoint}:`, error);
+    throw new Error(`Failed to call ${endpoint}: ${error.message}`);
+  }
+}
+
+/**
+ * Upload a dataset to the Python backend once. The returned dataset_id can be sent
+ * instead of `data` to the analysis endpoints until it expires (expires_in seconds).
+ */
+export async function storeDatasetWithPython(data: any): Promise<{
+  dataset_id: string;
+  rows: number;
+  columns: string[];
+  expires_in: number;
+}> {
+  try {
+    const response = await axios.post(`${PYTHON_URL}/datasets`, { data });
+    return response.data;
+  } catch (error: any) {
+    console.error('Error storing dataset in Python backend:', error);
+    throw new Error(`Failed to store dataset: ${error.message}`);
+  }
 }
\ No newline at end of file